@@ -1,26 +1,32 @@
 import contextlib
 import sys
 import os
-import ctypes
-import sqlite3
-import csv
-import requests
-import subprocess
+import html
+import threading
 import time
-import webbrowser
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                                QHBoxLayout, QLabel, QLineEdit, QPushButton, 
                                QTabWidget, QTableWidget, QTableWidgetItem, 
                                QHeaderView, QDateEdit, QComboBox, QMessageBox, 
                                QGroupBox, QGridLayout, QFrame, QSplitter, QAbstractItemView,
                                QDialog, QListWidget, QListWidgetItem, QMenu, QDoubleSpinBox,
-                               QSizePolicy, QTextEdit, QFileDialog, QScrollArea, QInputDialog, QProgressBar)
-from PySide6.QtCore import Qt, QDate, QSettings, QLocale, QThread, Signal
+                               QSizePolicy, QTextEdit, QFileDialog, QScrollArea, QInputDialog, QProgressBar,
+                               QTableView, QProgressDialog, QCheckBox)
+from PySide6.QtCore import (Qt, QDate, QSettings, QLocale, QThread, Signal, QAbstractTableModel, QModelIndex,
+                            QObject, QTimer, QThreadPool)
 from PySide6.QtGui import QIcon, QFont, QAction, QColor
+from nucleo import (Database, Diagnostico, SLOW_QUERY_LOG, fmt_data, fmt_qtd, COLUNAS_FOLHA, linha_folha, total_folha,
+                    COLUNAS_EXTRATO, linha_extrato, colunas_saldo, linha_saldo, COLUNAS_HISTORICO, linha_historico,
+                    em_metros, tijolos, concreto)
+
+# requests, csv, json, subprocess, webbrowser e ctypes são importados só onde são usados
+# (atualizador, exportações, NF no navegador), para não pesar na abertura do programa.
 
 # --- CONFIGURAÇÕES DA VERSÃO ---
 APP_VERSION = "1.1.0" 
 GITHUB_REPO = "Miizaa/Gestor-Obra" 
+UPDATE_API_URL = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
+UPDATE_CACHE = "update_cache.json"  # última release consultada + ETag
 
 # --- TEMAS DA APLICAÇÃO ---
 THEME_LIGHT = """
@@ -37,7 +43,7 @@ THEME_LIGHT = """
     
     QPushButton { background-color: #E0E0E0; border: 1px solid #BDBDBD; border-radius: 4px; padding: 6px; font-weight: bold; }
     QPushButton:hover { background-color: #D6D6D6; }
-    QTableWidget { background-color: #FFFFFF; alternate-background-color: #F9F9F9; gridline-color: #DDDDDD; }
+    QTableWidget, QTableView { background-color: #FFFFFF; alternate-background-color: #F9F9F9; gridline-color: #DDDDDD; }
     QHeaderView::section { background-color: #E0E0E0; padding: 4px; border: 1px solid #CCCCCC; font-weight: bold; }
     QListWidget { background-color: #FFFFFF; border: 1px solid #CCCCCC; }
     QTextEdit { background-color: #FFFFFF; border: 1px solid #CCCCCC; }
@@ -63,7 +69,7 @@ THEME_DARK = """
     
     QPushButton { background-color: #444444; border: 1px solid #666666; border-radius: 4px; padding: 6px; font-weight: bold; color: #FFFFFF;}
     QPushButton:hover { background-color: #555555; }
-    QTableWidget { background-color: #333333; alternate-background-color: #3A3A3A; gridline-color: #555555; color: #FFFFFF; }
+    QTableWidget, QTableView { background-color: #333333; alternate-background-color: #3A3A3A; gridline-color: #555555; color: #FFFFFF; }
     QHeaderView::section { background-color: #444444; padding: 4px; border: 1px solid #555555; font-weight: bold; color: #FFFFFF; }
     QListWidget { background-color: #3C3C3C; border: 1px solid #555555; color: #FFFFFF; }
     QTextEdit { background-color: #3C3C3C; border: 1px solid #555555; color: #FFFFFF; }
@@ -81,35 +87,148 @@ def resource_path(relative_path):
     except Exception: base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+# --- FILTRO AO VIVO ---
+# Reutilizável por qualquer campo de busca: espera o usuário parar de digitar (debounce), roda a
+# consulta numa thread do QThreadPool e descarta resultados já superados por teclas mais novas.
+class LiveFilter(QObject):
+    resultado = Signal(int, object, object)  # geração, argumentos, linhas
+
+    def __init__(self, db, consulta, aplicar, atraso_ms=250, parent=None):
+        super().__init__(parent)
+        self.db = db; self.consulta = consulta; self.aplicar = aplicar
+        self.geracao = 0; self.args = (); self.inicio = 0.0
+        self.ultima_latencia_ms = None
+        self.timer = QTimer(self); self.timer.setSingleShot(True); self.timer.setInterval(atraso_ms)
+        self.timer.timeout.connect(self.disparar)
+        self.resultado.connect(self.entregar)
+
+    def agendar(self, *args):
+        self.geracao += 1; self.args = args; self.inicio = time.perf_counter()
+        self.timer.start()
+
+    def agora(self, *args):
+        # Execução imediata (botões, combos): também invalida qualquer consulta em andamento
+        self.timer.stop()
+        self.geracao += 1; self.args = args; self.inicio = time.perf_counter()
+        self.entregar(self.geracao, args, self.consulta(self.db, *args))
+
+    def disparar(self):
+        geracao, args = self.geracao, self.args
+        if self.db.db_name == ":memory:":  # banco em memória não é visível de outra conexão
+            self.entregar(geracao, args, self.consulta(self.db, *args)); return
+        QThreadPool.globalInstance().start(lambda: self.executar(geracao, args))
+
+    def executar(self, geracao, args):  # roda na thread do pool
+        if geracao != self.geracao: return
+        # O Database dá a cada thread do pool a sua conexão; fechada no fim, porque a thread pode expirar
+        try: linhas = self.consulta(self.db, *args)
+        finally: self.db.liberar()
+        with contextlib.suppress(RuntimeError):  # a aba pode ter sido destruída no meio do caminho
+            self.resultado.emit(geracao, args, linhas)
+
+    def entregar(self, geracao, args, linhas):
+        if geracao != self.geracao: return
+        self.aplicar(args, linhas)
+        self.ultima_latencia_ms = (time.perf_counter() - self.inicio) * 1000
+
 # --- WORKER DE ATUALIZAÇÃO ---
 class UpdateWorker(QThread):
     progress = Signal(int)
-    finished = Signal()
+    concluido = Signal()  # só no sucesso (o QThread.finished também vem depois de um erro)
     error = Signal(str)
 
-    def __init__(self, download_url, save_path):
+    CHUNK_MIN, CHUNK_MAX = 16 * 1024, 4 * 1024 * 1024
+    INTERVALO_PROGRESSO = 0.25  # no máximo ~4 sinais de progresso por segundo
+    TENTATIVAS = 5
+
+    def __init__(self, download_url, save_path, sha256="", sha256_url="", delta_url="", base=""):
         super().__init__()
         self.url = download_url
         self.path = save_path
+        self.sha256 = sha256.lower(); self.sha256_url = sha256_url
+        self.delta_url = delta_url; self.base = base or sys.executable  # patch da versão instalada (opcional)
+        self.retomadas = 0; self.sinais = 0; self.modo = ""  # diagnóstico
 
+    # O download vai para um arquivo .part (nomeado pelo hash esperado) que sobrevive a quedas de conexão
+    # e reinícios do programa; cada nova tentativa continua de onde parou com um pedido HTTP Range.
     def run(self):
         try:
-            response = requests.get(self.url, stream=True)
-            total_size = int(response.headers.get('content-length', 0))
-            block_size = 1024
-            wrote = 0
-            with open(self.path, 'wb') as f:
-                for data in response.iter_content(block_size):
-                    wrote += len(data)
-                    f.write(data)
-                    if total_size > 0:
-                        self.progress.emit(int(wrote / total_size * 100))
-            self.finished.emit()
+            import hashlib, requests
+            if not self.sha256 and self.sha256_url:
+                resp = requests.get(self.sha256_url, timeout=15); resp.raise_for_status()
+                self.sha256 = resp.text.split()[0].lower()
+            if len(self.sha256) != 64: raise ValueError("A versão publicada não tem checksum SHA-256; atualização cancelada.")
+            if self.delta_url and self.aplicar_delta(requests, hashlib):
+                self.concluido.emit(); return
+            parcial = f"{self.path}.{self.sha256[:12]}.part"
+            hasher = self.com_tentativas(requests, lambda: self.baixar(requests, hashlib, self.url, parcial))
+            if hasher.hexdigest() != self.sha256:
+                os.remove(parcial)
+                raise ValueError("O arquivo baixado está corrompido (SHA-256 não confere). Tente novamente.")
+            os.replace(parcial, self.path); self.modo = "completo"
+            self.concluido.emit()
         except Exception as e:
             self.error.emit(str(e))
 
+    def com_tentativas(self, requests, baixar):
+        for tentativa in range(self.TENTATIVAS):
+            try: return baixar()
+            except requests.HTTPError: raise
+            except Exception:
+                if tentativa == self.TENTATIVAS - 1: raise
+                self.retomadas += 1; time.sleep(min(2 ** tentativa, 10))
+
+    # Atualização por diferença: baixa só o patch bsdiff da versão instalada para a nova e remonta o executável.
+    # Qualquer problema (bsdiff4 ausente, patch inválido, executável local diferente) cai no download completo.
+    def aplicar_delta(self, requests, hashlib):
+        parcial = f"{self.path}.{self.sha256[:12]}.delta.part"
+        try:
+            import bsdiff4
+            self.com_tentativas(requests, lambda: self.baixar(requests, hashlib, self.delta_url, parcial))
+            with open(self.base, 'rb') as f: antigo = f.read()
+            with open(parcial, 'rb') as f: novo = bsdiff4.patch(antigo, f.read())
+            if hashlib.sha256(novo).hexdigest() != self.sha256: raise ValueError("SHA-256 do resultado não confere")
+            with open(self.path, 'wb') as f: f.write(novo)
+            self.modo = "delta"; return True
+        except Exception:
+            self.progress.emit(0); return False
+        finally:
+            with contextlib.suppress(OSError): os.remove(parcial)
+
+    def baixar(self, requests, hashlib, url, parcial):
+        # O hash é calculado em fluxo: primeiro sobre o que já está no .part, depois sobre cada bloco recebido
+        hasher = hashlib.sha256(); feito = 0
+        if os.path.exists(parcial):
+            with open(parcial, 'rb') as f:
+                while bloco := f.read(self.CHUNK_MAX): hasher.update(bloco); feito += len(bloco)
+        headers = {"Range": f"bytes={feito}-"} if feito else {}
+        with requests.get(url, stream=True, headers=headers, timeout=(10, 60)) as resp:
+            if resp.status_code == 416 and feito: return hasher  # o .part já estava completo
+            resp.raise_for_status()
+            if resp.status_code != 206: hasher = hashlib.sha256(); feito = 0  # servidor ignorou o Range: recomeça
+            total = feito + int(resp.headers.get('content-length', 0))
+            chunk = 256 * 1024; ultimo_sinal = 0.0
+            with open(parcial, 'ab' if feito else 'wb') as f:
+                while True:
+                    t0 = time.perf_counter()
+                    data = resp.raw.read(chunk, decode_content=True)
+                    if not data: break
+                    f.write(data); hasher.update(data); feito += len(data)
+                    # Bloco adaptativo: cresce em conexões rápidas, encolhe nas lentas para o progresso não travar
+                    dt = time.perf_counter() - t0
+                    if dt < 0.05: chunk = min(chunk * 2, self.CHUNK_MAX)
+                    elif dt > 0.5: chunk = max(chunk // 2, self.CHUNK_MIN)
+                    agora = time.monotonic()
+                    if total > 0 and agora - ultimo_sinal >= self.INTERVALO_PROGRESSO:
+                        self.progress.emit(int(feito / total * 100)); self.sinais += 1; ultimo_sinal = agora
+            if total > 0 and feito < total: raise IOError(f"Conexão interrompida ({feito} de {total} bytes)")
+        self.progress.emit(100); self.sinais += 1
+        return hasher
+
 class AutoUpdater(QDialog):
-    def __init__(self, parent=None):
+    release_recebida = Signal(object)
+
+    def __init__(self, parent=None, api_url=None, cache_path=None, intervalo_h=None):
         super().__init__(parent)
         self.setWindowTitle("Atualização Disponível")
         self.resize(300, 150)
@@ -120,36 +239,89 @@ class AutoUpdater(QDialog):
         self.layout.addWidget(self.bar)
         self.setLayout(self.layout)
         self.download_url = ""
+        self.sha256 = ""; self.sha256_url = ""  # checksum publicado do executável
+        self.delta_url = ""  # patch binário a partir da versão instalada, se publicado
         self.new_version = ""
         self.release_notes = ""  # NOVO: Variável para guardar o texto do GitHub
         self.is_windows = sys.platform == "win32"
+        self.api_url = api_url or UPDATE_API_URL; self.cache_path = cache_path or UPDATE_CACHE
+        # Intervalo mínimo entre consultas à API (horas); dentro dele usa só o cache em disco
+        self.intervalo_h = QSettings("MiizaSoft", "GestorObras").value("update_interval_h", 6.0, type=float) if intervalo_h is None else intervalo_h
+        self.ultima_fonte = ""  # "cache", "rede", "304" ou "falha" (para diagnóstico)
+        self.release_recebida.connect(self.on_release)
+
+    def ler_cache(self):
+        import json
+        try:
+            with open(self.cache_path, encoding="utf-8") as f: return json.load(f)
+        except: return {}
 
-    def check_updates(self):
+    def gravar_cache(self, cache):
+        import json
         try:
-            api_url = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
-            resp = requests.get(api_url, timeout=5)
-            if resp.status_code == 200:
-                data = resp.json()
-                tag_name = data.get("tag_name", "").replace("v", "")
-                
-                # NOVO: Pega o texto preenchido lá no GitHub
-                self.release_notes = data.get("body", "Nenhuma nota de atualização fornecida.")
-                
-                if tag_name != APP_VERSION:
-                    assets = data.get("assets", [])
-                    for asset in assets:
-                        nome_arquivo = asset["name"].lower()
-                        if self.is_windows and nome_arquivo.endswith(".exe"):
-                            self.download_url = asset["browser_download_url"]
-                            self.new_version = tag_name
-                            return True
-                        elif not self.is_windows and "linux" in nome_arquivo:
-                            self.download_url = asset["browser_download_url"]
-                            self.new_version = tag_name
-                            return True
-            return False
+            with open(self.cache_path, "w", encoding="utf-8") as f: json.dump(cache, f)
+        except: pass
+
+    # Pode rodar fora do thread da GUI: só mexe no cache e na rede. Sem internet, devolve a última release conhecida.
+    def buscar_release(self, forcar=False):
+        cache = self.ler_cache()
+        if not forcar and cache.get("release") is not None and time.time() - cache.get("checked_at", 0) < self.intervalo_h * 3600:
+            self.ultima_fonte = "cache"; return cache["release"]
+        headers = {"If-None-Match": cache["etag"]} if cache.get("etag") and cache.get("release") is not None else {}
+        try:
+            import requests
+            resp = requests.get(self.api_url, headers=headers, timeout=5)
+            if resp.status_code == 304 and headers:
+                self.ultima_fonte = "304"
+            elif resp.status_code == 200:
+                cache = {"etag": resp.headers.get("ETag", ""), "release": resp.json()}; self.ultima_fonte = "rede"
+            else:
+                self.ultima_fonte = "falha"; return cache.get("release")
+            cache["checked_at"] = time.time(); self.gravar_cache(cache)
         except:
-            return False
+            self.ultima_fonte = "falha"
+        return cache.get("release")
+
+    def aplicar_release(self, data):
+        if not data: return False
+        tag_name = data.get("tag_name", "").replace("v", "")
+        
+        # NOVO: Pega o texto preenchido lá no GitHub
+        self.release_notes = data.get("body", "Nenhuma nota de atualização fornecida.")
+        
+        if tag_name != APP_VERSION:
+            assets = data.get("assets", [])
+            por_nome = {asset["name"].lower(): asset for asset in assets}
+            for asset in assets:
+                nome_arquivo = asset["name"].lower()
+                if nome_arquivo.endswith((".sha256", ".bsdiff")): continue
+                if (self.is_windows and nome_arquivo.endswith(".exe")) or (not self.is_windows and "linux" in nome_arquivo):
+                    self.download_url = asset["browser_download_url"]
+                    self.new_version = tag_name
+                    # Checksum: campo "digest" do GitHub ("sha256:...") ou um asset "<nome>.sha256" ao lado
+                    digest = asset.get("digest") or ""
+                    self.sha256 = digest[7:] if digest.startswith("sha256:") else ""
+                    self.sha256_url = por_nome.get(nome_arquivo + ".sha256", {}).get("browser_download_url", "")
+                    # Delta opcional: "<nome>.from-<versão instalada>.bsdiff"
+                    self.delta_url = por_nome.get(f"{nome_arquivo}.from-{APP_VERSION}.bsdiff", {}).get("browser_download_url", "")
+                    return True
+        return False
+
+    def check_updates(self, forcar=False):
+        try: return self.aplicar_release(self.buscar_release(forcar))
+        except: return False
+
+    # Consulta em segundo plano: a janela principal abre na hora, mesmo offline ou com a API lenta
+    def check_updates_async(self, forcar=False):
+        def tarefa():
+            release = self.buscar_release(forcar)
+            with contextlib.suppress(RuntimeError): self.release_recebida.emit(release)
+        threading.Thread(target=tarefa, daemon=True).start()
+
+    def on_release(self, release):
+        try: encontrada = self.aplicar_release(release)
+        except: encontrada = False
+        if encontrada: self.start_update()
 
     def start_update(self):
         if not getattr(sys, 'frozen', False):
@@ -172,16 +344,22 @@ class AutoUpdater(QDialog):
         if msg.exec() == QMessageBox.Yes:
             self.show()
             self.temp_file = "update_temp.exe" if self.is_windows else "update_temp"
-            self.worker = UpdateWorker(self.download_url, self.temp_file)
+            self.worker = UpdateWorker(self.download_url, self.temp_file, self.sha256, self.sha256_url, self.delta_url)
             self.worker.progress.connect(self.bar.setValue)
-            self.worker.finished.connect(self.apply_update)
+            self.worker.concluido.connect(self.apply_update)
+            self.worker.error.connect(self.falhar)
             self.worker.start()
 
+    def falhar(self, msg):
+        self.hide()
+        QMessageBox.critical(self, "Erro na Atualização", f"Não foi possível baixar a atualização:\n{msg}")
+
     def apply_update(self):
         self.lbl.setText("Preparando para reiniciar...")
         nome_atual = os.path.basename(sys.executable)
         
         try:
+            import subprocess
             if self.is_windows:
                 bat_script = f"""@echo off
 title Atualizando Sistema...
@@ -213,385 +391,130 @@ rm "$0"
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Falha ao iniciar atualização: {e}")
 
-# --- 1. BANCO DE DADOS ---
-class Database:
-    def __init__(self, db_name="obra_gestor.db"): 
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
-        self.create_tables()
-        self.migrate_tables() 
-
-    def create_tables(self):
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS obras (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT NOT NULL, endereco TEXT, data_inicio TEXT
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS funcionarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                obra_id INTEGER, 
-                nome TEXT, funcao TEXT, data_admissao TEXT, telefone TEXT,
-                cpf TEXT, rg TEXT, banco TEXT, agencia TEXT, conta TEXT,
-                valor_diaria REAL DEFAULT 0.0,
-                ativo INTEGER DEFAULT 1,
-                FOREIGN KEY(obra_id) REFERENCES obras(id)
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS historico_status (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                func_id INTEGER,
-                data TEXT,
-                novo_status INTEGER, 
-                motivo TEXT,
-                FOREIGN KEY(func_id) REFERENCES funcionarios(id)
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS presenca (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, 
-                func_id INTEGER, 
-                data TEXT, 
-                manha INTEGER DEFAULT 0,
-                tarde INTEGER DEFAULT 0,
-                UNIQUE(func_id, data)
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS estoque (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                obra_id INTEGER, 
-                item TEXT NOT NULL, 
-                categoria TEXT, 
-                unidade TEXT NOT NULL, 
-                quantidade REAL DEFAULT 0,
-                alerta_qtd REAL DEFAULT 5.0,
-                alerta_on INTEGER DEFAULT 1,
-                FOREIGN KEY(obra_id) REFERENCES obras(id)
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS movimentacoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_id INTEGER, 
-                data TEXT, 
-                tipo TEXT, 
-                quantidade REAL, 
-                origem TEXT, 
-                destino TEXT, 
-                nota_fiscal TEXT,
-                FOREIGN KEY(item_id) REFERENCES estoque(id)
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS diario (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                obra_id INTEGER,
-                data TEXT,
-                clima TEXT,
-                atividades TEXT,
-                ocorrencias TEXT,
-                UNIQUE(obra_id, data)
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS financeiro (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                obra_id INTEGER,
-                data TEXT,
-                tipo TEXT,
-                valor REAL,
-                descricao TEXT,
-                nota_fiscal TEXT,
-                FOREIGN KEY(obra_id) REFERENCES obras(id)
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS epi (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                obra_id INTEGER,
-                func_id INTEGER,
-                data TEXT,
-                item TEXT,
-                FOREIGN KEY(obra_id) REFERENCES obras(id),
-                FOREIGN KEY(func_id) REFERENCES funcionarios(id)
-            )
-        """)
-        self.conn.commit()
-
-    def migrate_tables(self):
-        if not self.check_column_exists("funcionarios", "data_admissao"):
-            self.cursor.execute("ALTER TABLE funcionarios ADD COLUMN data_admissao TEXT")
-        if not self.check_column_exists("funcionarios", "telefone"):
-            self.cursor.execute("ALTER TABLE funcionarios ADD COLUMN telefone TEXT")
-        if not self.check_column_exists("funcionarios", "ativo"):
-            self.cursor.execute("ALTER TABLE funcionarios ADD COLUMN ativo INTEGER DEFAULT 1")
-        if not self.check_column_exists("funcionarios", "valor_diaria"):
-            self.cursor.execute("ALTER TABLE funcionarios ADD COLUMN valor_diaria REAL DEFAULT 0.0")
-
-        if not self.check_column_exists("estoque", "categoria"):
-            self.cursor.execute("ALTER TABLE estoque ADD COLUMN categoria TEXT DEFAULT 'Geral'")
-        if not self.check_column_exists("movimentacoes", "origem"):
-            self.cursor.execute("ALTER TABLE movimentacoes ADD COLUMN origem TEXT")
-            if self.check_column_exists("movimentacoes", "fornecedor"):
-                self.cursor.execute("UPDATE movimentacoes SET origem = fornecedor")
-        if not self.check_column_exists("movimentacoes", "destino"):
-            self.cursor.execute("ALTER TABLE movimentacoes ADD COLUMN destino TEXT")
-        if not self.check_column_exists("presenca", "manha"):
-            self.cursor.execute("ALTER TABLE presenca ADD COLUMN manha INTEGER DEFAULT 0")
-            self.cursor.execute("ALTER TABLE presenca ADD COLUMN tarde INTEGER DEFAULT 0")
-            if self.check_column_exists("presenca", "presente"):
-                self.cursor.execute("UPDATE presenca SET manha=1, tarde=1 WHERE presente=1")
-        if not self.check_column_exists("financeiro", "nota_fiscal"):
-            self.cursor.execute("ALTER TABLE financeiro ADD COLUMN nota_fiscal TEXT")
-        
-        # MUDANÇA NOVA: QUANTIDADE NO FINANCEIRO
-        if not self.check_column_exists("financeiro", "quantidade"):
-            self.cursor.execute("ALTER TABLE financeiro ADD COLUMN quantidade REAL DEFAULT 1.0")
-        
-        if not self.check_column_exists("estoque", "alerta_qtd"):
-            self.cursor.execute("ALTER TABLE estoque ADD COLUMN alerta_qtd REAL DEFAULT 5.0")
-        if not self.check_column_exists("estoque", "alerta_on"):
-            self.cursor.execute("ALTER TABLE estoque ADD COLUMN alerta_on INTEGER DEFAULT 1")
-            
-        self.conn.commit()
-
-    def check_column_exists(self, table_name, column_name):
-        self.cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = [info[1] for info in self.cursor.fetchall()]
-        return column_name in columns
-
-    # --- MÉTODOS DE OBRAS ---
-    def criar_obra(self, nome, endereco):
-        self.cursor.execute("INSERT INTO obras (nome, endereco, data_inicio) VALUES (?, ?, ?)", 
-                            (nome, endereco, QDate.currentDate().toString("yyyy-MM-dd")))
-        self.conn.commit()
-    def get_obras(self):
-        self.cursor.execute("SELECT * FROM obras ORDER BY id DESC")
-        return self.cursor.fetchall()
-
-    # --- FUNCIONÁRIOS ---
-    def add_funcionario(self, obra_id, nome, funcao, admissao, tel, cpf, rg, banco, agencia, conta, diaria):
-        try:
-            self.cursor.execute("""
-                INSERT INTO funcionarios (obra_id, nome, funcao, data_admissao, telefone, cpf, rg, banco, agencia, conta, valor_diaria, ativo) 
-                VALUES (?,?,?,?,?,?,?,?,?,?,?,1)""", (obra_id, nome, funcao, admissao, tel, cpf, rg, banco, agencia, conta, diaria))
-            self.conn.commit(); return True
-        except: return False
+# --- EXPORTAÇÃO CSV EM SEGUNDO PLANO ---
+# Lê direto do banco em lotes (fetchmany) e grava com csv.writer numa QThread: a memória não cresce
+# com o tamanho do histórico e a janela continua respondendo.
+class ExportWorker(QThread):
+    progress = Signal(int)
+    concluido = Signal(int, bool)  # linhas gravadas, cancelado (não sobrepõe o QThread.finished)
+    error = Signal(str)
 
-    def update_funcionario(self, fid, nome, funcao, admissao, tel, cpf, rg, banco, agencia, conta, diaria):
-        try:
-            self.cursor.execute("""
-                UPDATE funcionarios 
-                SET nome=?, funcao=?, data_admissao=?, telefone=?, cpf=?, rg=?, banco=?, agencia=?, conta=?, valor_diaria=? 
-                WHERE id=?""", (nome, funcao, admissao, tel, cpf, rg, banco, agencia, conta, diaria, fid))
-            self.conn.commit(); return True
-        except: return False
+    def __init__(self, db, path, headers, consulta, formatar, preparar=None):
+        super().__init__()
+        self.db = db; self.path = path; self.headers = headers
+        self.query, self.params = consulta
+        self.formatar = formatar; self.preparar = preparar  # gravação prévia (ex.: checkpoints), fora da janela
 
-    def toggle_ativo_funcionario(self, fid, status, motivo=""):
-        data_hoje = QDate.currentDate().toString("yyyy-MM-dd")
+    def run(self):
+        db = self.db  # nesta thread, o Database usa conexões próprias (liberadas no fim)
         try:
-            self.cursor.execute("UPDATE funcionarios SET ativo=? WHERE id=?", (status, fid))
-            self.cursor.execute("INSERT INTO historico_status (func_id, data, novo_status, motivo) VALUES (?,?,?,?)",
-                                (fid, data_hoje, status, motivo))
-            self.conn.commit()
-            return True
-        except: return False
+            if self.preparar: self.preparar()
+            total = db.contar(self.query, self.params); escritas = 0; ultimo = -1
+            with open(self.path, 'w', newline='', encoding='utf-8') as f:
+                import csv
+                writer = csv.writer(f, delimiter=';')
+                writer.writerow(self.headers)
+                for lote in db.iterar_lotes(self.query, self.params):
+                    if self.isInterruptionRequested(): break
+                    writer.writerows(self.formatar(r) for r in lote)
+                    escritas += len(lote)
+                    pct = int(escritas * 100 / total) if total else 100
+                    if pct != ultimo: self.progress.emit(pct); ultimo = pct
+            cancelado = self.isInterruptionRequested()
+            if cancelado: os.remove(self.path)  # não deixa arquivo pela metade
+            self.concluido.emit(escritas, cancelado)
+        except Exception as e:
+            self.error.emit(str(e))
+        finally:
+            db.liberar()
+
+class ExportDialog(QProgressDialog):
+    # O caminho vem escolhido de fora (como no ImportDialog): um QProgressDialog criado e largado
+    # aparece sozinho depois do minimumDuration mesmo que o usuário cancele o "Salvar como"
+    def __init__(self, parent, db, titulo, path, headers, consulta, formatar, preparar=None):
+        super().__init__("Exportando...", "Cancelar", 0, 100, parent)
+        self.setWindowTitle(titulo); self.setAutoClose(False); self.setAutoReset(False)
+        self.path = path
+        self.worker = ExportWorker(db, self.path, headers, consulta, formatar, preparar)
+        self.worker.progress.connect(self.setValue)
+        self.worker.concluido.connect(self.concluir)
+        self.worker.error.connect(self.falhar)
+        self.canceled.connect(self.worker.requestInterruption)
+        self.show()
+        if db.db_name == ":memory:": self.worker.run()  # sem outra conexão possível: roda aqui mesmo
+        else: self.worker.start()
+
+    def encerrar(self):
+        # Fechar só esconde: o diálogo (filho da aba) e a QThread ficariam vivos até a aba ser destruída. O worker
+        # já emitiu o resultado e está saindo do run; o deleteLater vem antes da caixa de mensagem (laço aninhado)
+        self.close(); self.worker.wait(); self.deleteLater()
+
+    def concluir(self, linhas, cancelado):
+        self.encerrar()
+        if cancelado: QMessageBox.information(self.parent(), "Cancelado", "Exportação cancelada.")
+        else: QMessageBox.information(self.parent(), "Sucesso", f"Exportação concluída! ({linhas} linhas)")
+
+    def falhar(self, msg):
+        self.encerrar(); QMessageBox.critical(self.parent(), "Erro", f"Erro ao exportar: {msg}")
+
+# --- IMPORTAÇÃO (CSV / NF-e) EM SEGUNDO PLANO ---
+# Mesmo esquema da exportação: conexão própria numa QThread chamando um método de importação do Database
+# (que recebe progresso/cancelar). O CSV grava numa transação só; a NF-e grava em lotes de notas.
+class ImportWorker(QThread):
+    progress = Signal(int)
+    concluido = Signal(object)  # resultado do método, ou None se cancelado sem gravar nada
+    error = Signal(str)
 
-    def get_historico_funcionario(self, fid):
-        self.cursor.execute("SELECT data, novo_status, motivo FROM historico_status WHERE func_id=? ORDER BY data DESC, id DESC", (fid,))
-        return self.cursor.fetchall()
+    def __init__(self, db, metodo, args):
+        super().__init__()
+        self.db = db; self.metodo = metodo; self.args = args
 
-    def get_funcionarios(self, obra_id, apenas_ativos=True):
-        cols = "id, obra_id, nome, funcao, data_admissao, telefone, cpf, rg, banco, agencia, conta, ativo, valor_diaria"
-        if apenas_ativos:
-            self.cursor.execute(f"SELECT {cols} FROM funcionarios WHERE obra_id=? AND ativo=1 ORDER BY nome ASC", (obra_id,))
-        else:
-            self.cursor.execute(f"SELECT {cols} FROM funcionarios WHERE obra_id=? AND ativo=0 ORDER BY nome ASC", (obra_id,))
-        return self.cursor.fetchall()
-    
-    def get_funcionario_by_id(self, fid):
-        cols = "id, obra_id, nome, funcao, data_admissao, telefone, cpf, rg, banco, agencia, conta, ativo, valor_diaria"
-        self.cursor.execute(f"SELECT {cols} FROM funcionarios WHERE id=?", (fid,))
-        return self.cursor.fetchone()
-
-    # --- MÉTODOS DE PRESENÇA ---
-    def salvar_presenca(self, func_id, data, manha, tarde):
-        self.cursor.execute("""
-            INSERT INTO presenca (func_id, data, manha, tarde) 
-            VALUES (?,?,?,?) 
-            ON CONFLICT(func_id, data) 
-            DO UPDATE SET manha=excluded.manha, tarde=excluded.tarde
-        """, (func_id, data, 1 if manha else 0, 1 if tarde else 0))
-        self.conn.commit()
-    
-    def get_presenca_dia(self, obra_id, data):
-        self.cursor.execute("""
-            SELECT p.func_id, p.manha, p.tarde FROM presenca p
-            JOIN funcionarios f ON p.func_id = f.id
-            WHERE f.obra_id = ? AND p.data = ?
-        """, (obra_id, data))
-        return {r[0]: {'m': r[1], 't': r[2]} for r in self.cursor.fetchall()}
-    
-    def relatorio_periodo(self, obra_id, d1, d2):
-        self.cursor.execute("""
-            SELECT f.nome, f.funcao, f.data_admissao, f.telefone, 
-                   SUM(COALESCE(p.manha, 0) + COALESCE(p.tarde, 0)) * 0.5 as dias, 
-                   f.cpf, f.rg, f.banco, f.agencia, f.conta,
-                   f.valor_diaria
-            FROM funcionarios f 
-            LEFT JOIN presenca p ON f.id=p.func_id AND p.data BETWEEN ? AND ? 
-            WHERE f.obra_id = ?
-            GROUP BY f.id ORDER BY f.nome ASC""", (d1, d2, obra_id))
-        return self.cursor.fetchall()
-
-    # --- MÉTODOS DE ESTOQUE ---
-    def add_material(self, obra_id, item, categoria, unidade, alerta_qtd=5.0, alerta_on=1):
-        self.cursor.execute("""
-            INSERT INTO estoque (obra_id, item, categoria, unidade, quantidade, alerta_qtd, alerta_on) 
-            VALUES (?, ?, ?, ?, 0, ?, ?)
-        """, (obra_id, item, categoria, unidade, alerta_qtd, alerta_on))
-        self.conn.commit()
-
-    def update_material(self, item_id, item, categoria, unidade, quantidade, alerta_qtd, alerta_on):
-        self.cursor.execute("""
-            UPDATE estoque SET item=?, categoria=?, unidade=?, quantidade=?, alerta_qtd=?, alerta_on=? WHERE id=?
-        """, (item, categoria, unidade, quantidade, alerta_qtd, alerta_on, item_id))
-        self.conn.commit()
-
-    def get_estoque(self, obra_id):
-        cols = "id, obra_id, item, categoria, unidade, quantidade"
-        self.cursor.execute(f"SELECT {cols} FROM estoque WHERE obra_id=? ORDER BY item ASC", (obra_id,))
-        return self.cursor.fetchall()
-    
-    def get_material_by_id(self, item_id):
-        cols = "id, obra_id, item, categoria, unidade, quantidade, alerta_qtd, alerta_on"
-        self.cursor.execute(f"SELECT {cols} FROM estoque WHERE id=?", (item_id,))
-        return self.cursor.fetchone()
-
-    def get_historico(self, obra_id, filtro_item="", filtro_origem="", filtro_tipo="Todos", filtro_cat="Todas"):
-        query = """
-            SELECT m.id, m.data, e.item, e.categoria, m.tipo, m.quantidade, e.unidade, m.origem, m.destino, m.nota_fiscal 
-            FROM movimentacoes m 
-            JOIN estoque e ON m.item_id = e.id 
-            WHERE e.obra_id = ? 
-        """
-        params = [obra_id]
-        if filtro_item: query += " AND e.item LIKE ?"; params.append(f"%{filtro_item}%")
-        if filtro_origem: 
-            query += " AND (m.origem LIKE ? OR m.destino LIKE ?)"
-            params.append(f"%{filtro_origem}%"); params.append(f"%{filtro_origem}%")
-        if filtro_tipo == "Entrada":
-            query += " AND m.tipo = 'entrada'"
-        elif filtro_tipo == "Saída":
-            query += " AND m.tipo = 'saida'"
-        elif filtro_tipo == "Uso Interno":
-            query += " AND m.tipo = 'uso_interno'"
-        if filtro_cat != "Todas": query += " AND e.categoria = ?"; params.append(filtro_cat)
-        query += " ORDER BY m.data DESC, m.id DESC"
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall()
-    
-    def movimentar_estoque(self, item_id, qtd, tipo, data, origem, destino, nf):
-        fator = 1 if tipo == "entrada" else -1
-        self.cursor.execute("UPDATE estoque SET quantidade = quantidade + ? WHERE id = ?", (qtd * fator, item_id))
-        self.cursor.execute("""
-            INSERT INTO movimentacoes (item_id, data, tipo, quantidade, origem, destino, nota_fiscal) 
-            VALUES (?,?,?,?,?,?,?)
-        """, (item_id, data, tipo, qtd, origem, destino, nf))
-        self.conn.commit()
-
-    def excluir_movimentacao(self, mov_id):
-        self.cursor.execute("SELECT item_id, quantidade, tipo FROM movimentacoes WHERE id=?", (mov_id,))
-        mov = self.cursor.fetchone()
-        if not mov: return False
-        item_id, qtd, tipo = mov
-        fator_reverso = -1 if tipo == 'entrada' else 1
+    def run(self):
+        db = self.db
         try:
-            self.cursor.execute("UPDATE estoque SET quantidade = quantidade + ? WHERE id = ?", (qtd * fator_reverso, item_id))
-            self.cursor.execute("DELETE FROM movimentacoes WHERE id = ?", (mov_id,))
-            self.conn.commit(); return True
-        except: self.conn.rollback(); return False
-
-    # --- MÉTODOS DIÁRIO DE OBRA ---
-    def save_diario(self, obra_id, data, clima, ativ, ocor):
-        self.cursor.execute("""
-            INSERT INTO diario (obra_id, data, clima, atividades, ocorrencias) 
-            VALUES (?,?,?,?,?) 
-            ON CONFLICT(obra_id, data) 
-            DO UPDATE SET clima=excluded.clima, atividades=excluded.atividades, ocorrencias=excluded.ocorrencias
-        """, (obra_id, data, clima, ativ, ocor))
-        self.conn.commit()
-
-    def get_diario(self, obra_id, data):
-        self.cursor.execute("SELECT clima, atividades, ocorrencias FROM diario WHERE obra_id=? AND data=?", (obra_id, data))
-        return self.cursor.fetchone()
-
-    # --- MÉTODOS FINANCEIRO ---
-    def add_financeiro(self, obra_id, data, tipo, valor, quantidade, desc, nf):
-        self.cursor.execute("INSERT INTO financeiro (obra_id, data, tipo, valor, quantidade, descricao, nota_fiscal) VALUES (?,?,?,?,?,?,?)", (obra_id, data, tipo, valor, quantidade, desc, nf))
-        self.conn.commit()
-    
-    def get_financeiro(self, obra_id):
-        self.cursor.execute("SELECT id, data, tipo, valor, quantidade, descricao, nota_fiscal FROM financeiro WHERE obra_id=? ORDER BY data DESC, id DESC", (obra_id,))
-        return self.cursor.fetchall()
-    
-    def delete_financeiro(self, fin_id):
-        try: self.cursor.execute("DELETE FROM financeiro WHERE id=?", (fin_id,)); self.conn.commit(); return True
-        except: return False
-
-    # --- MÉTODOS EPI ---
-    def add_epi(self, obra_id, func_id, data, item):
-        self.cursor.execute("INSERT INTO epi (obra_id, func_id, data, item) VALUES (?,?,?,?)", (obra_id, func_id, data, item))
-        self.conn.commit()
-        
-    def get_epi_historico(self, obra_id):
-        self.cursor.execute("""
-            SELECT e.id, e.data, f.nome, e.item 
-            FROM epi e 
-            JOIN funcionarios f ON e.func_id = f.id 
-            WHERE e.obra_id = ? ORDER BY e.data DESC
-        """, (obra_id,))
-        return self.cursor.fetchall()
-    
-    def delete_epi(self, epi_id):
-        try: self.cursor.execute("DELETE FROM epi WHERE id=?", (epi_id,)); self.conn.commit(); return True
-        except: return False
+            self.concluido.emit(getattr(db, self.metodo)(*self.args, progresso=self.progress.emit,
+                                                         cancelar=self.isInterruptionRequested))
+        except InterruptedError:
+            self.concluido.emit(None)
+        except Exception as e:
+            self.error.emit(str(e))
+        finally:
+            db.liberar()
+
+class ImportDialog(QProgressDialog):
+    def __init__(self, parent, db, titulo, metodo, args, resumir, rotulo_erro="{}", ao_concluir=None):
+        super().__init__("Importando...", "Cancelar", 0, 100, parent)
+        self.setWindowTitle(titulo); self.setAutoClose(False); self.setAutoReset(False)
+        self.resumir = resumir; self.rotulo_erro = rotulo_erro; self.ao_concluir = ao_concluir
+        self.worker = ImportWorker(db, metodo, args)
+        self.worker.progress.connect(self.setValue)
+        self.worker.concluido.connect(self.concluir)
+        self.worker.error.connect(self.falhar)
+        self.canceled.connect(self.worker.requestInterruption)
+        self.show()
+        if db.db_name == ":memory:": self.worker.run()
+        else: self.worker.start()
+
+    def encerrar(self):
+        self.close(); self.worker.wait(); self.deleteLater()  # como no ExportDialog
+
+    def concluir(self, res):
+        self.encerrar()
+        if res is None:
+            QMessageBox.information(self.parent(), "Cancelado", "Importação cancelada. Nada foi gravado."); return
+        if self.ao_concluir: self.ao_concluir()
+        msg = self.resumir(res)
+        if res.total_erros:
+            msg += f"\n\n{res.total_erros} ignorados:\n" + "\n".join(f"{self.rotulo_erro.format(n)}: {e}" for n, e in res.erros[:15])
+            if res.total_erros > 15: msg += "\n..."
+            QMessageBox.warning(self.parent(), "Importação concluída com erros", msg)
+        else: QMessageBox.information(self.parent(), "Sucesso", msg)
+
+    def falhar(self, msg):
+        self.encerrar(); QMessageBox.critical(self.parent(), "Erro", f"Erro ao importar: {msg}")
 
-    # --- MÉTODOS PARA DASHBOARD ---
-    def get_dashboard_stats(self, obra_id, data):
-        self.cursor.execute("SELECT SUM(CASE WHEN tipo='entrada' THEN valor ELSE -valor END) FROM financeiro WHERE obra_id=?", (obra_id,))
-        saldo = self.cursor.fetchone()[0] or 0.0
-        
-        self.cursor.execute("""
-            SELECT COUNT(DISTINCT p.func_id) FROM presenca p
-            JOIN funcionarios f ON p.func_id = f.id
-            WHERE f.obra_id=? AND p.data=? AND (p.manha=1 OR p.tarde=1)
-        """, (obra_id, data))
-        presentes_count = self.cursor.fetchone()[0] or 0
-        
-        self.cursor.execute("""
-            SELECT DISTINCT f.nome FROM presenca p
-            JOIN funcionarios f ON p.func_id = f.id
-            WHERE f.obra_id=? AND p.data=? AND (p.manha=1 OR p.tarde=1)
-            ORDER BY f.nome ASC
-        """, (obra_id, data))
-        lista_presentes = [r[0] for r in self.cursor.fetchall()]
-        
-        self.cursor.execute("""
-            SELECT item, quantidade, unidade 
-            FROM estoque 
-            WHERE obra_id=? AND alerta_on=1 AND quantidade < alerta_qtd 
-            ORDER BY quantidade ASC
-        """, (obra_id,))
-        baixo_estoque = self.cursor.fetchall()
-        
-        self.cursor.execute("SELECT clima, atividades, ocorrencias FROM diario WHERE obra_id=? AND data=?", (obra_id, data))
-        diario = self.cursor.fetchone() 
-        
-        return saldo, presentes_count, baixo_estoque, diario, lista_presentes
+# --- 1. BANCO DE DADOS ---
+# Database, folha, saldos e calculadoras ficam no pacote `nucleo` (sem Qt); aqui só a interface.
 
 # --- 2. SELETOR DE OBRAS ---
 class ProjectSelector(QDialog):
@@ -616,6 +539,8 @@ class ProjectSelector(QDialog):
         btn_open.setStyleSheet("background-color: #4CAF50; color: white; padding: 10px; font-weight: bold; border:none;")
         btn_open.clicked.connect(self.abrir_obra)
         layout.addWidget(btn_open)
+        btn_geral = QPushButton("📊 Visão Geral das Obras"); btn_geral.clicked.connect(self.abrir_visao_geral)
+        layout.addWidget(btn_geral)
         line = QFrame(); line.setFrameShape(QFrame.HLine); line.setFrameShadow(QFrame.Sunken); layout.addWidget(line)
         gb_new = QGroupBox("Criar Nova Obra"); lay_new = QHBoxLayout()
         self.in_nome = QLineEdit(); self.in_nome.setPlaceholderText("Nome da Obra")
@@ -632,6 +557,10 @@ class ProjectSelector(QDialog):
         if self.in_nome.text():
             self.db.criar_obra(self.in_nome.text(), self.in_end.text())
             self.in_nome.clear(); self.in_end.clear(); self.load_list(); QMessageBox.information(self, "Sucesso", "Nova obra criada!")
+    def abrir_visao_geral(self):
+        dialog = PortfolioDialog(self.db, self)
+        if dialog.exec() == QDialog.Accepted and dialog.selected_obra:
+            self.selected_obra = dialog.selected_obra; self.accept()
     def abrir_obra(self):
         if current_item := self.list_obras.currentItem():
             if current_item: self.selected_obra = current_item.data(Qt.UserRole)
@@ -810,9 +739,10 @@ class DashboardTab(QWidget):
         card.findChild(QLabel, "v").setText(val)
     
     def load_data(self):
-        s, p_count, b_stock, diario, p_names = self.db.get_dashboard_stats(self.obra_id, QDate.currentDate().toString("yyyy-MM-dd"))
-        self.update_card(self.card_saldo, f"R$ {s:.2f}")
-        self.update_card(self.card_func, str(p_count))
+        stats = self.db.get_dashboard_stats(self.obra_id, QDate.currentDate().toString("yyyy-MM-dd"))
+        diario, p_names, b_stock = stats.diario, stats.lista_presentes, stats.baixo_estoque
+        self.update_card(self.card_saldo, f"R$ {stats.saldo:.2f}")
+        self.update_card(self.card_func, str(stats.presentes_count))
         
         if diario:
             self.update_card(self.card_clima, diario[0] if diario[0] else "--")
@@ -969,6 +899,7 @@ class EmployeeManager(QWidget):
     def ld(self):
         fs = self.db.get_funcionarios(self.obra_id)
         p = self.db.get_presenca_dia(self.obra_id, self.dt.date().toString("yyyy-MM-dd"))
+        self.presenca_carregada = p
         self.tb.setRowCount(0)
         for r, d in enumerate(fs):
             self.tb.insertRow(r)
@@ -998,14 +929,97 @@ class EmployeeManager(QWidget):
             
     def svp(self):
         d = self.dt.date().toString("yyyy-MM-dd")
+        alteradas = []
         for r in range(self.tb.rowCount()): 
             fid = int(self.tb.item(r,0).text())
             manha = self.tb.item(r, 10).checkState() == Qt.Checked
             tarde = self.tb.item(r, 11).checkState() == Qt.Checked
-            self.db.salvar_presenca(fid, d, manha, tarde)
+            # Só envia as linhas que mudaram em relação ao que foi carregado do banco
+            antes = self.presenca_carregada.get(fid, {'m': 0, 't': 0})
+            if manha != bool(antes['m']) or tarde != bool(antes['t']):
+                alteradas.append((fid, manha, tarde))
+        if alteradas:
+            self.db.salvar_presencas(d, alteradas)
+            for fid, manha, tarde in alteradas:
+                self.presenca_carregada[fid] = {'m': int(manha), 't': int(tarde)}
         QMessageBox.information(self,"Ok","Salvo")
 
 # --- 8. ABA: ESTOQUE DA OBRA ---
+# Modelo do histórico: busca as movimentações do SQLite sob demanda, uma página por vez,
+# conforme a rolagem (canFetchMore/fetchMore) em vez de materializar tudo num QTableWidget.
+class HistoricoModel(QAbstractTableModel):
+    COLUNAS = ["ID", *COLUNAS_HISTORICO]
+    TIPOS = {"entrada": ("Entrada", "#4CAF50"), "saida": ("Saída", "#F44336"), "uso_interno": ("Uso Interno", "#FF9800")}
+    PAGINA = 200
+
+    def __init__(self, db, obra_id, parent=None):
+        super().__init__(parent)
+        self.db = db; self.obra_id = obra_id
+        self.filtros = ("", "", "Todos", "Todas")
+        self.linhas = []; self.fim = True
+
+    def primeira_pagina(self, db, *filtros):
+        return db.get_historico(self.obra_id, *filtros, limite=self.PAGINA)
+
+    def carregar(self, *filtros):
+        self.aplicar(filtros, self.primeira_pagina(self.db, *filtros))
+
+    def aplicar(self, filtros, linhas):
+        self.beginResetModel()
+        self.filtros = filtros; self.linhas = list(linhas); self.fim = len(self.linhas) < self.PAGINA
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUNAS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole: return self.COLUNAS[section]
+        return None
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.fim
+
+    def fetchMore(self, parent):
+        if parent.isValid() or self.fim: return
+        apos = (self.linhas[-1][1], self.linhas[-1][0]) if self.linhas else None
+        novas = self.db.get_historico(self.obra_id, *self.filtros, apos=apos, limite=self.PAGINA)
+        self.fim = len(novas) < self.PAGINA
+        if novas:
+            self.beginInsertRows(QModelIndex(), len(self.linhas), len(self.linhas) + len(novas) - 1)
+            self.linhas.extend(novas)
+            self.endInsertRows()
+
+    def mov_id(self, r):
+        return self.linhas[r][0]
+
+    def localizar(self, mov_id, data):
+        # A ordem é (data, id) decrescente: basta paginar até passar da chave procurada
+        while self.canFetchMore(QModelIndex()) and (not self.linhas or (self.linhas[-1][1], self.linhas[-1][0]) > (data, mov_id)):
+            self.fetchMore(QModelIndex())
+        return next((r for r, d in enumerate(self.linhas) if d[0] == mov_id), None)
+
+    def texto(self, r, c):
+        return self.formatar(self.linhas[r], c)
+
+    def formatar(self, d, c):
+        if c == 0: return str(d[0])
+        if c == 1: return fmt_data(d[1])
+        if c == 2: return d[2]
+        if c == 3: return d[3] or "-"
+        if c == 4: return self.TIPOS.get(d[4], self.TIPOS["uso_interno"])[0]
+        if c == 5: return f"{d[5]} {d[6]}"
+        return d[c + 1] or ""
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        if role == Qt.DisplayRole: return self.texto(index.row(), index.column())
+        if role == Qt.ForegroundRole and index.column() == 4:
+            return QColor(self.TIPOS.get(self.linhas[index.row()][4], self.TIPOS["uso_interno"])[1])
+        return None
+
 class StockControl(QWidget):
     def __init__(self, db, obra_id):
         super().__init__()
@@ -1015,7 +1029,14 @@ class StockControl(QWidget):
         main = QHBoxLayout()
         lw = QWidget()
         ll = QVBoxLayout()
-        ll.addWidget(QLabel("📦 Saldo da Obra"))
+        h_saldo = QHBoxLayout(); h_saldo.addWidget(QLabel("📦 Saldo da Obra")); h_saldo.addStretch()
+        self.dt_saldo = QDateEdit(QDate.currentDate()); self.dt_saldo.setCalendarPopup(True); self.dt_saldo.setDisplayFormat("dd/MM/yyyy")
+        self.dt_saldo.setToolTip("Mostra o saldo de cada item ao final do dia escolhido")
+        # Datas antigas criam checkpoints na primeira consulta (segundos num banco grande): roda numa thread do pool
+        self.filtro_s = LiveFilter(self.db, lambda db, data: db.get_estoque(self.obra_id, data), self.aplicar_saldo, parent=self)
+        self.dt_saldo.dateChanged.connect(lambda: self.filtro_s.agendar(self.data_saldo()))
+        h_saldo.addWidget(QLabel("Em:")); h_saldo.addWidget(self.dt_saldo)
+        ll.addLayout(h_saldo)
         self.tb_s = QTableWidget(0,4); self.tb_s.setHorizontalHeaderLabels(["ID", "Item", "Categoria", "Quantidade"])
         self.tb_s.setColumnHidden(0,True)
         self.tb_s.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
@@ -1051,8 +1072,9 @@ class StockControl(QWidget):
         btn_del.setStyleSheet("background-color: #F44336; color: white; border:none;")
         btn_del.clicked.connect(self.delete_move)
         
-        self.f_item.textChanged.connect(self.load_history)
-        self.f_origem.textChanged.connect(self.load_history)
+        # Campos de texto: filtro ao vivo com debounce em segundo plano; combos e botão: imediato
+        self.f_item.textChanged.connect(lambda: self.filtro_h.agendar(*self.filtros_historico()))
+        self.f_origem.textChanged.connect(lambda: self.filtro_h.agendar(*self.filtros_historico()))
         self.f_tipo.currentTextChanged.connect(self.load_history)
         self.f_cat.currentTextChanged.connect(self.load_history)
         filter_layout.addWidget(self.f_item)
@@ -1065,17 +1087,23 @@ class StockControl(QWidget):
         h_hist_btns = QHBoxLayout()
         btn_export_h = QPushButton("📤 Exp. Histórico")
         btn_export_h.clicked.connect(self.export_historico)
+        btn_import = QPushButton("📥 Importar CSV")
+        btn_import.clicked.connect(self.importar_csv)
         h_hist_btns.addWidget(btn_del)
         h_hist_btns.addWidget(btn_export_h)
+        h_hist_btns.addWidget(btn_import)
         ll.addLayout(h_hist_btns)
         
-        self.tb_h = QTableWidget(0,9) 
-        self.tb_h.setHorizontalHeaderLabels(["ID","Data","Item","Categoria","Tipo","Quantidade","Origem","Destino", "NF"])
+        self.model_h = HistoricoModel(self.db, self.obra_id, self)
+        self.tb_h = QTableView()
+        self.tb_h.setModel(self.model_h)
+        self.filtro_h = LiveFilter(self.db, self.model_h.primeira_pagina, self.model_h.aplicar, parent=self)
+        self.tb_h.verticalHeader().setDefaultSectionSize(24)
         self.tb_h.setColumnHidden(0,True)
         self.tb_h.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
         self.tb_h.horizontalHeader().setStretchLastSection(True) 
         self.tb_h.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.tb_h.cellDoubleClicked.connect(self.abrir_nf_navegador)
+        self.tb_h.doubleClicked.connect(lambda idx: self.abrir_nf_navegador(idx.row(), idx.column()))
         ll.addWidget(self.tb_h)
         lw.setLayout(ll)
         
@@ -1187,7 +1215,7 @@ class StockControl(QWidget):
         if not rows: 
             QMessageBox.warning(self, "Aviso", "Selecione uma movimentação.")
             return
-        mov_id = int(self.tb_h.item(rows[0].row(), 0).text())
+        mov_id = self.model_h.mov_id(rows[0].row())
         if QMessageBox.question(self, "Confirmar", "Excluir movimentação?", QMessageBox.Yes|QMessageBox.No) == QMessageBox.Yes:
             if self.db.excluir_movimentacao(mov_id): 
                 self.ref()
@@ -1206,7 +1234,19 @@ class StockControl(QWidget):
         self.sid = None
         self.lb_s.setText("Selecione...")
         self.lb_s.setStyleSheet("color:red; font-weight:bold;")
-        est = self.db.get_estoque(self.obra_id)
+        self.ref_saldo()
+        self.load_history()
+
+    def data_saldo(self):
+        # None = saldo atual (data de hoje ou futura); senão, saldo ao final do dia escolhido
+        d = self.dt_saldo.date()
+        return None if d >= QDate.currentDate() else d.toString("yyyy-MM-dd")
+
+    def ref_saldo(self):
+        self.filtro_s.agora(self.data_saldo())
+
+    def aplicar_saldo(self, args, est):
+        data, = args
         self.tb_s.setRowCount(0)
         for r,d in enumerate(est):
             self.tb_s.insertRow(r)
@@ -1214,65 +1254,53 @@ class StockControl(QWidget):
             self.tb_s.setItem(r,1,QTableWidgetItem(d[2]))
             self.tb_s.setItem(r,2,QTableWidgetItem(d[3] or "-"))
             self.tb_s.setItem(r,3,QTableWidgetItem(f"{d[5]} {d[4]}"))
-        self.load_history()
+        self.tb_s.setHorizontalHeaderItem(3, QTableWidgetItem(colunas_saldo(data)[2]))
         
+    def selecionar_item(self, item_id):
+        for r in range(self.tb_s.rowCount()):
+            if int(self.tb_s.item(r, 0).text()) == item_id:
+                self.tb_s.selectRow(r); self.tb_s.scrollToItem(self.tb_s.item(r, 1)); self.sel(r, 1); return
+
+    def selecionar_movimentacao(self, mov_id, data):
+        # Limpa os filtros e carrega páginas só até chegar na movimentação procurada
+        for w in (self.f_item, self.f_origem): w.blockSignals(True); w.clear(); w.blockSignals(False)
+        for w in (self.f_tipo, self.f_cat): w.blockSignals(True); w.setCurrentIndex(0); w.blockSignals(False)
+        self.load_history()
+        if (r := self.model_h.localizar(mov_id, data)) is not None:
+            self.tb_h.selectRow(r); self.tb_h.scrollTo(self.model_h.index(r, 1))
+
+    def filtros_historico(self):
+        return self.f_item.text(), self.f_origem.text(), self.f_tipo.currentText(), self.f_cat.currentText()
+
     def load_history(self):
-        f_mat = self.f_item.text()
-        f_orig = self.f_origem.text()
-        f_tip = self.f_tipo.currentText()
-        f_cat = self.f_cat.currentText()
-        his = self.db.get_historico(self.obra_id, f_mat, f_orig, f_tip, f_cat)
-        self.tb_h.setRowCount(0)
-        for r,d in enumerate(his):
-            self.tb_h.insertRow(r)
-            self.tb_h.setItem(r,0,QTableWidgetItem(str(d[0])))
-            try: fmt_dt = QDate.fromString(d[1], "yyyy-MM-dd").toString("dd/MM/yyyy")
-            except: fmt_dt = d[1]
-            self.tb_h.setItem(r,1,QTableWidgetItem(fmt_dt))
-            self.tb_h.setItem(r,2,QTableWidgetItem(d[2]))
-            self.tb_h.setItem(r,3,QTableWidgetItem(d[3] or "-"))
-            
-            tipo_val = d[4]
-            if tipo_val == "entrada":
-                tipo_item = QTableWidgetItem("Entrada"); tipo_item.setForeground(QColor("#4CAF50"))
-            elif tipo_val == "saida":
-                tipo_item = QTableWidgetItem("Saída"); tipo_item.setForeground(QColor("#F44336"))
-            else:
-                tipo_item = QTableWidgetItem("Uso Interno"); tipo_item.setForeground(QColor("#FF9800")) 
-            
-            self.tb_h.setItem(r,4, tipo_item)
-            self.tb_h.setItem(r,5,QTableWidgetItem(f"{d[5]} {d[6]}"))
-            self.tb_h.setItem(r,6,QTableWidgetItem(d[7] or ""))
-            self.tb_h.setItem(r,7,QTableWidgetItem(d[8] or ""))
-            self.tb_h.setItem(r,8,QTableWidgetItem(d[9] or ""))
-
-    def export_csv(self, table, filename_prefix):
-        path, _ = QFileDialog.getSaveFileName(self, "Exportar para CSV", f"{filename_prefix}.csv", "CSV Files (*.csv)")
-        if not path: return
-        try:
-            with open(path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f, delimiter=';')
-                headers = [table.horizontalHeaderItem(i).text() for i in range(table.columnCount()) if not table.isColumnHidden(i)]
-                writer.writerow(headers)
-                for r in range(table.rowCount()):
-                    row_data = []
-                    for c in range(table.columnCount()):
-                        if not table.isColumnHidden(c):
-                            item = table.item(r, c)
-                            row_data.append(item.text() if item else "")
-                    writer.writerow(row_data)
-            QMessageBox.information(self, "Sucesso", "Exportação concluída!")
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao exportar: {e}")
+        self.filtro_h.agora(*self.filtros_historico())
 
-    def export_saldo(self): self.export_csv(self.tb_s, "saldo_estoque")
-    def export_historico(self): self.export_csv(self.tb_h, "historico_estoque")
+    def export_saldo(self):
+        # Exporta o saldo da data selecionada (checkpoints que faltarem são criados na thread de exportação)
+        data = self.data_saldo()
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar Saldo", f"saldo_estoque_{data}.csv" if data else "saldo_estoque.csv", "CSV Files (*.csv)")
+        if not path: return
+        preparar = (lambda: self.db.atualizar_snapshots(self.obra_id)) if data and not self.db.saldo_direto(data) else None
+        ExportDialog(self, self.db, "Exportar Saldo", path, colunas_saldo(data), self.db.sql_estoque(self.obra_id, data), linha_saldo, preparar)
+
+    def importar_csv(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Importar Movimentações (data;item;categoria;quantidade;tipo;origem;destino;nf)",
+                                              "", "CSV Files (*.csv)")
+        if path:
+            ImportDialog(self, self.db, "Importar Movimentações", "importar_movimentacoes", (self.obra_id, path),
+                         lambda r: f"{r.importadas} movimentações importadas, {r.itens_criados} itens novos cadastrados.",
+                         "Linha {}", self.ref)
+
+    def export_historico(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar Histórico", "historico_estoque.csv", "CSV Files (*.csv)")
+        if path:
+            ExportDialog(self, self.db, "Exportar Histórico", path, COLUNAS_HISTORICO,
+                         self.db.sql_historico(self.obra_id, *self.filtros_historico()), linha_historico)
     # ABRIR O SITE DA FAZENDA PARA CONSULTAR A NOTA FISCAL:
     def abrir_nf_navegador(self, r, c):
         if c == 8: # A coluna 8 é a da Nota Fiscal no Histórico
-            item = self.tb_h.item(r, c)
-            if item and item.text().strip():
-                nf_texto = item.text().strip()
+            nf_texto = self.model_h.texto(r, c).strip()
+            if nf_texto:
                 # Extrai apenas os números (remove espaços, pontos, etc)
                 chave = ''.join(filter(str.isdigit, nf_texto)) 
                 
@@ -1285,6 +1313,7 @@ class StockControl(QWidget):
                         QApplication.clipboard().setText(chave)
                         # Link oficial do Portal Nacional da NF-e
                         url = f"https://www.nfe.fazenda.gov.br/portal/consultaRecaptcha.aspx?tipoConsulta=resumo&mNFe={chave}"
+                        import webbrowser
                         webbrowser.open(url)
                         QMessageBox.information(self, "Copiado", "A chave foi copiada para sua área de transferência!\n\nBasta colar (Ctrl+V) no site da Fazenda se for solicitado no Captcha.")
 
@@ -1303,6 +1332,7 @@ class ReportTab(QWidget):
         d2.setDisplayFormat("dd/MM/yyyy")
         d1.setCalendarPopup(True)
         d2.setCalendarPopup(True)
+        self.d1 = d1; self.d2 = d2; self.periodo = None
         
         b = QPushButton("Gerar Relatório")
         b.clicked.connect(lambda: self.g(d1.date().toString("yyyy-MM-dd"), d2.date().toString("yyyy-MM-dd")))
@@ -1316,8 +1346,8 @@ class ReportTab(QWidget):
         h.addWidget(b_export)
         
         self.t = QTableWidget(0,12)
-        colunas = ["Nome","Função","Admissão","Telefone","Dias","CPF","RG","Banco","Agência","Conta", "Valor Diária", "Total a Pagar"]
-        self.t.setHorizontalHeaderLabels(colunas)
+        self.colunas = COLUNAS_FOLHA
+        self.t.setHorizontalHeaderLabels(self.colunas)
         header = self.t.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Interactive)
         header.setStretchLastSection(True)
@@ -1338,53 +1368,26 @@ class ReportTab(QWidget):
         if val := QSettings("MiizaSoft", "GestorObras").value("report_table_state"): self.t.horizontalHeader().restoreState(val)
 
     def g(self,d1,d2):
+        self.periodo = (d1, d2)
         ds = self.db.relatorio_periodo(self.obra_id, d1, d2)
         self.t.setRowCount(0)
-        total_geral = 0.0
         
         for r,row in enumerate(ds): 
             self.t.insertRow(r)
-            self.t.setItem(r, 0, QTableWidgetItem(row[0]))
-            self.t.setItem(r, 1, QTableWidgetItem(row[1]))
-            try: fmt = QDate.fromString(row[2], "yyyy-MM-dd").toString("dd/MM/yyyy")
-            except: fmt = row[2]
-            self.t.setItem(r, 2, QTableWidgetItem(fmt))
-            self.t.setItem(r, 3, QTableWidgetItem(row[3])) 
-            
-            dias_trabalhados = row[4] if row[4] else 0.0
-            self.t.setItem(r, 4, QTableWidgetItem(str(dias_trabalhados)))
-            
-            self.t.setItem(r, 5, QTableWidgetItem(row[5]))
-            self.t.setItem(r, 6, QTableWidgetItem(row[6]))
-            self.t.setItem(r, 7, QTableWidgetItem(row[7]))
-            self.t.setItem(r, 8, QTableWidgetItem(row[8]))
-            self.t.setItem(r, 9, QTableWidgetItem(row[9]))
-            
-            valor_diaria = row[10] if len(row) > 10 and row[10] else 0.0
-            total_pagar = dias_trabalhados * valor_diaria
-            total_geral += total_pagar
-            
-            self.t.setItem(r, 10, QTableWidgetItem(f"R$ {valor_diaria:.2f}"))
-            item_total = QTableWidgetItem(f"R$ {total_pagar:.2f}")
+            for c, valor in enumerate(linha_folha(row)): self.t.setItem(r, c, QTableWidgetItem(valor))
+            item_total = self.t.item(r, 11)
             item_total.setForeground(QColor("#4CAF50"))
             item_total.setFont(QFont("Arial", 9, QFont.Bold))
-            self.t.setItem(r, 11, item_total)
 
-        self.lbl_total_folha.setText(f"Total Geral da Folha: R$ {total_geral:.2f}")
-    
+        self.lbl_total_folha.setText(f"Total Geral da Folha: R$ {total_folha(ds):.2f}")
+
     def export_report(self):
+        # Exporta o período do último relatório gerado (ou o das datas na tela, se ainda não gerou)
+        d1, d2 = self.periodo or (self.d1.date().toString("yyyy-MM-dd"), self.d2.date().toString("yyyy-MM-dd"))
         path, _ = QFileDialog.getSaveFileName(self, "Exportar Relatório", "folha_pagamento.csv", "CSV Files (*.csv)")
-        if not path: return
-        try:
-            with open(path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f, delimiter=';')
-                headers = [self.t.horizontalHeaderItem(i).text() for i in range(self.t.columnCount())]
-                writer.writerow(headers)
-                for r in range(self.t.rowCount()):
-                    row = [self.t.item(r, c).text() if self.t.item(r, c) else "" for c in range(self.t.columnCount())]
-                    writer.writerow(row)
-            QMessageBox.information(self, "Sucesso", "Relatório exportado!")
-        except Exception as e: QMessageBox.critical(self, "Erro", str(e))
+        if path:
+            ExportDialog(self, self.db, "Exportar Relatório", path, self.colunas,
+                         self.db.sql_relatorio(self.obra_id, d1, d2), linha_folha)
 
 # --- 10. ABA: CALCULADORA DE MATERIAL ---
 class MaterialCalculator(QWidget): 
@@ -1420,39 +1423,22 @@ class MaterialCalculator(QWidget):
         gb2.setLayout(lay_conc_inner)
         l.addWidget(gb1); l.addWidget(gb2); l.addStretch(); self.setLayout(l)
 
-    def get_val_in_meters(self, val_text, unit):
-        try:
-            val = float(val_text.replace(',', '.'))
-            if unit == "cm": return val / 100
-            return val
-        except: return 0.0
-
     def ca(self):
         try: 
-            w = self.get_val_in_meters(self.w.text(), self.u_w.currentText())
-            h = self.get_val_in_meters(self.h.text(), self.u_w.currentText())
-            bw = self.get_val_in_meters(self.bh.text(), self.u_b.currentText())
-            bl = self.get_val_in_meters(self.bl.text(), self.u_b.currentText())
-            if bw*bl == 0: raise ValueError
-            total = (w * h) / (bw * bl)
-            self.ra.setText(f"Total (+10%): {int(total * 1.1)}")
+            w = em_metros(self.w.text(), self.u_w.currentText())
+            h = em_metros(self.h.text(), self.u_w.currentText())
+            bw = em_metros(self.bh.text(), self.u_b.currentText())
+            bl = em_metros(self.bl.text(), self.u_b.currentText())
+            self.ra.setText(f"Total (+10%): {tijolos(w, h, bw, bl)}")
         except: self.ra.setText("Erro")
 
     def cc(self):
         try:
-            comp = self.get_val_in_meters(self.conc_comp.text(), self.uc_comp.currentText())
-            larg = self.get_val_in_meters(self.conc_larg.text(), self.uc_larg.currentText())
-            esp = self.get_val_in_meters(self.conc_esp.text(), self.uc_esp.currentText())
-            vol_m3 = comp * larg * esp
-            vol_seco = vol_m3 * 1.52
-            part_c = self.sp_c.value(); part_a = self.sp_a.value(); part_b = self.sp_b.value()
-            total_parts = part_c + part_a + part_b
-            if total_parts == 0: raise ValueError
-            vol_cimento = (part_c / total_parts) * vol_seco
-            vol_areia = (part_a / total_parts) * vol_seco
-            vol_brita = (part_b / total_parts) * vol_seco
-            sacos_cimento = (vol_cimento * 1440) / 50
-            self.res_conc.setText(f"Vol: {vol_m3:.2f}m³ | Cim: {sacos_cimento:.1f} sc | Areia: {vol_areia:.2f}m³ | Brita: {vol_brita:.2f}m³")
+            comp = em_metros(self.conc_comp.text(), self.uc_comp.currentText())
+            larg = em_metros(self.conc_larg.text(), self.uc_larg.currentText())
+            esp = em_metros(self.conc_esp.text(), self.uc_esp.currentText())
+            c = concreto(comp, larg, esp, self.sp_c.value(), self.sp_a.value(), self.sp_b.value())
+            self.res_conc.setText(f"Vol: {c.volume:.2f}m³ | Cim: {c.sacos_cimento:.1f} sc | Areia: {c.areia:.2f}m³ | Brita: {c.brita:.2f}m³")
         except: self.res_conc.setText("Erro: Verifique números.")
 
 # --- 11. ABA: DIÁRIO DE OBRA ---
@@ -1542,28 +1528,24 @@ class FinancialTab(QWidget):
 
     def load_data(self):
         rows = self.db.get_financeiro(self.obra_id)
-        self.tb.setRowCount(0); saldo = 0
+        self.tb.setRowCount(0)
         for r, row in enumerate(rows):
             self.tb.insertRow(r)
             # row = [id, data, tipo, valor, quantidade, descricao, nota_fiscal]
             self.tb.setItem(r, 0, QTableWidgetItem(str(row[0])))
-            try: fmt = QDate.fromString(row[1], "yyyy-MM-dd").toString("dd/MM/yyyy")
-            except: fmt = row[1]
-            self.tb.setItem(r, 1, QTableWidgetItem(fmt))
+            self.tb.setItem(r, 1, QTableWidgetItem(fmt_data(row[1])))
             tipo_item = QTableWidgetItem(row[2].upper())
-            if row[2] == 'entrada': tipo_item.setForeground(QColor("#4CAF50")); saldo += row[3]
-            else: tipo_item.setForeground(QColor("#F44336")); saldo -= row[3]
+            if row[2] == 'entrada': tipo_item.setForeground(QColor("#4CAF50"))
+            else: tipo_item.setForeground(QColor("#F44336"))
             self.tb.setItem(r, 2, tipo_item)
             self.tb.setItem(r, 3, QTableWidgetItem(f"R$ {row[3]:.2f}"))
             
-            qtd_val = row[4] if row[4] is not None else 1.0
-            # Se for inteiro (ex: 5.0), mostra 5. Se for decimal (ex: 1.5), mostra 1.5
-            qtd_str = f"{qtd_val:.2f}".rstrip('0').rstrip('.') if '.' in f"{qtd_val:.2f}" else f"{qtd_val:.2f}"
-            self.tb.setItem(r, 4, QTableWidgetItem(qtd_str))
+            self.tb.setItem(r, 4, QTableWidgetItem(fmt_qtd(row[4])))
             
             self.tb.setItem(r, 5, QTableWidgetItem(row[5]))
             self.tb.setItem(r, 6, QTableWidgetItem(row[6] or ""))
             
+        saldo = self.db.get_saldo(self.obra_id)
         color = "#4CAF50" if saldo >= 0 else "#F44336"
         self.lbl_saldo.setText(f"Saldo: R$ {saldo:.2f}")
         self.lbl_saldo.setStyleSheet(f"font-size: 18px; font-weight: bold; color: {color};")
@@ -1582,9 +1564,15 @@ class FinancialTab(QWidget):
                     if resposta == QMessageBox.Yes:
                         QApplication.clipboard().setText(chave)
                         url = f"https://www.nfe.fazenda.gov.br/portal/consultaRecaptcha.aspx?tipoConsulta=resumo&mNFe={chave}"
+                        import webbrowser
                         webbrowser.open(url)
                         QMessageBox.information(self, "Copiado", "A chave foi copiada para sua área de transferência!\n\nBasta colar (Ctrl+V) no site da Fazenda se for solicitado no Captcha.")
 
+    def selecionar(self, fin_id):
+        for r in range(self.tb.rowCount()):
+            if int(self.tb.item(r, 0).text()) == fin_id:
+                self.tb.selectRow(r); self.tb.scrollToItem(self.tb.item(r, 1)); return
+
     def delete_entry(self):
         rows = self.tb.selectionModel().selectedRows()
         if not rows: return
@@ -1594,21 +1582,9 @@ class FinancialTab(QWidget):
             
     def export_data(self):
         path, _ = QFileDialog.getSaveFileName(self, "Exportar Extrato", "extrato_financeiro.csv", "CSV Files (*.csv)")
-        if not path: return
-        try:
-            with open(path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f, delimiter=';')
-                headers = [self.tb.horizontalHeaderItem(i).text() for i in range(self.tb.columnCount()) if not self.tb.isColumnHidden(i)]
-                writer.writerow(headers)
-                for r in range(self.tb.rowCount()):
-                    row = []
-                    for c in range(self.tb.columnCount()):
-                        if not self.tb.isColumnHidden(c):
-                            item = self.tb.item(r, c)
-                            row.append(item.text() if item else "")
-                    writer.writerow(row)
-            QMessageBox.information(self, "Sucesso", "Extrato exportado!")
-        except Exception as e: QMessageBox.critical(self, "Erro", str(e))
+        if path:
+            ExportDialog(self, self.db, "Exportar Extrato", path, COLUNAS_EXTRATO,
+                         self.db.sql_financeiro(self.obra_id), linha_extrato)
 
 # --- 13. ABA: CONTROLE DE EPI ---
 class EPITab(QWidget):
@@ -1663,20 +1639,182 @@ class EPITab(QWidget):
         if QMessageBox.question(self, "Confirmar", "Apagar registro?", QMessageBox.Yes|QMessageBox.No) == QMessageBox.Yes:
             self.db.delete_epi(id_val); self.load_data()
 
-# --- 14. JANELA PRINCIPAL ---
+# --- 14. BUSCA GLOBAL ---
+class SearchDialog(QDialog):
+    TIPOS = {"diario": "📘 Diário", "financeiro": "💰 Financeiro", "estoque": "📦 Material", "movimentacoes": "🔁 Movimentação"}
+
+    def __init__(self, db, obra_id, termo="", parent=None):
+        super().__init__(parent)
+        self.db = db; self.obra_id = obra_id; self.destino = None
+        self.setWindowTitle("Buscar na Obra"); self.resize(700, 450)
+        l = QVBoxLayout()
+        self.in_busca = QLineEdit(); self.in_busca.setPlaceholderText("Digite para buscar em diário, financeiro, materiais e movimentações...")
+        self.lst = QListWidget(); self.lst.itemDoubleClicked.connect(self.abrir)
+        self.lbl_info = QLabel("Dê um duplo clique no resultado para abrir o registro.")
+        l.addWidget(self.in_busca); l.addWidget(self.lst); l.addWidget(self.lbl_info); self.setLayout(l)
+
+        self.filtro = LiveFilter(db, lambda db_, t: db_.buscar(obra_id, t, marcas=("\x02", "\x03")), self.mostrar, atraso_ms=200, parent=self)
+        self.in_busca.textChanged.connect(self.filtro.agendar)
+        if termo:
+            self.in_busca.blockSignals(True); self.in_busca.setText(termo); self.in_busca.blockSignals(False)
+            self.filtro.agora(termo)
+
+    def mostrar(self, args, hits):
+        self.lst.clear()
+        for tabela, ref_id, data, trecho, _ in hits:
+            data_fmt = QDate.fromString(data, "yyyy-MM-dd").toString("dd/MM/yyyy") if data else ""
+            trecho = html.escape(trecho or "").replace("\x02", "<b style='color:#FF9800'>").replace("\x03", "</b>")
+            lbl = QLabel(f"<b>{self.TIPOS[tabela]}</b> &nbsp;{data_fmt}<br>{trecho}")
+            item = QListWidgetItem(); item.setData(Qt.UserRole, (tabela, ref_id, data))
+            item.setSizeHint(lbl.sizeHint()); self.lst.addItem(item); self.lst.setItemWidget(item, lbl)
+        self.lbl_info.setText(f"{len(hits)} resultado(s) para \"{args[0]}\". Duplo clique para abrir.")
+
+    def abrir(self, item):
+        self.destino = item.data(Qt.UserRole); self.accept()
+
+# --- 15. PAINEL GERAL DAS OBRAS ---
+class PortfolioDialog(QDialog):
+    COLUNAS = ["Obra", "Endereço", "Saldo", "Presentes Hoje", "Estoque Baixo", "Último Diário"]
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db; self.selected_obra = None
+        self.dados = {}; self.versao = None  # obra_id -> PortfolioObra exibida / última versão do banco lida
+        self.setWindowTitle("Visão Geral das Obras"); self.resize(850, 450)
+        l = QVBoxLayout()
+        self.tb = QTableWidget(0, len(self.COLUNAS)); self.tb.setHorizontalHeaderLabels(self.COLUNAS)
+        self.tb.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive); self.tb.horizontalHeader().setStretchLastSection(True)
+        self.tb.setColumnWidth(0, 220); self.tb.setColumnWidth(1, 200)
+        self.tb.setEditTriggers(QAbstractItemView.NoEditTriggers); self.tb.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tb.cellDoubleClicked.connect(self.abrir)
+        self.lbl_info = QLabel("Duplo clique em uma obra para abri-la.")
+        l.addWidget(self.tb); l.addWidget(self.lbl_info); self.setLayout(l)
+        # Atualização incremental: só consulta se o banco mudou e só repinta as obras que mudaram
+        self.timer = QTimer(self); self.timer.setInterval(3000); self.timer.timeout.connect(self.atualizar); self.timer.start()
+        self.atualizar()
+
+    def atualizar(self):
+        hoje = QDate.currentDate().toString("yyyy-MM-dd")
+        versao = (self.db.versao_dados(), hoje)
+        if versao == self.versao: return
+        self.versao = versao
+        obras = self.db.get_portfolio(hoje)
+        if [o.obra_id for o in obras] != list(self.dados):  # obra criada/removida: remonta a tabela
+            self.dados = {}; self.tb.setRowCount(len(obras))
+        for r, obra in enumerate(obras):
+            if self.dados.get(obra.obra_id) != obra: self.preencher(r, obra)
+        self.dados = {o.obra_id: o for o in obras}
+        self.lbl_info.setText(f"{len(obras)} obra(s). Duplo clique em uma obra para abri-la.")
+
+    def preencher(self, r, obra):
+        self.tb.setItem(r, 0, QTableWidgetItem(obra.nome)); self.tb.setItem(r, 1, QTableWidgetItem(obra.endereco or ""))
+        it_saldo = QTableWidgetItem(f"R$ {obra.saldo:.2f}"); it_saldo.setForeground(QColor("#4CAF50" if obra.saldo >= 0 else "#F44336"))
+        self.tb.setItem(r, 2, it_saldo)
+        self.tb.setItem(r, 3, QTableWidgetItem(str(obra.presentes)))
+        it_baixo = QTableWidgetItem(f"⚠️ {obra.baixo_estoque}" if obra.baixo_estoque else "0")
+        if obra.baixo_estoque: it_baixo.setForeground(QColor("#FF9800"))
+        self.tb.setItem(r, 4, it_baixo)
+        self.tb.setItem(r, 5, QTableWidgetItem(fmt_data(obra.ultimo_diario) or "-"))
+        self.tb.item(r, 0).setData(Qt.UserRole, (obra.obra_id, obra.nome, obra.endereco))
+
+    def abrir(self, r, c):
+        self.selected_obra = self.tb.item(r, 0).data(Qt.UserRole); self.accept()
+
+# --- 16. DIAGNÓSTICO DE DESEMPENHO (JANELA OCULTA: Ctrl+Shift+D) ---
+def diagnostico_salvo(limite_ms=None):
+    # Diagnostico conforme as preferências (None se estiver desligado)
+    settings = QSettings("MiizaSoft", "GestorObras")
+    if limite_ms is None:
+        if not settings.value("diagnostico", False, type=bool): return None
+        limite_ms = settings.value("diagnostico_limite_ms", 100.0, type=float)
+    return Diagnostico(SLOW_QUERY_LOG, limite_ms)
+
+class DiagnosticoDialog(QDialog):
+    COLUNAS = ["Nome", "Chamadas", "Total (ms)", "p50 (ms)", "p95 (ms)", "Máx (ms)", "Linhas/chamada"]
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.setWindowTitle("Diagnóstico de Desempenho"); self.resize(1000, 550)
+        l = QVBoxLayout(); topo = QHBoxLayout()
+        self.chk = QCheckBox("Medir tempos do banco de dados"); self.chk.setChecked(db.diagnostico is not None)
+        self.chk.toggled.connect(self.ligar)
+        self.sp_limite = QDoubleSpinBox(); self.sp_limite.setRange(1, 60000); self.sp_limite.setDecimals(0); self.sp_limite.setSuffix(" ms")
+        self.sp_limite.setValue(QSettings("MiizaSoft", "GestorObras").value("diagnostico_limite_ms", 100.0, type=float))
+        self.sp_limite.valueChanged.connect(self.mudar_limite)
+        topo.addWidget(self.chk); topo.addStretch(); topo.addWidget(QLabel("Registrar no log acima de:")); topo.addWidget(self.sp_limite)
+        self.abas = QTabWidget(); self.tabelas = {}
+        for tipo, titulo in (("método", "Métodos"), ("sql", "Comandos SQL")):
+            tb = QTableWidget(0, len(self.COLUNAS)); tb.setHorizontalHeaderLabels(self.COLUNAS)
+            tb.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive); tb.setColumnWidth(0, 380)
+            tb.setEditTriggers(QAbstractItemView.NoEditTriggers); tb.setSelectionBehavior(QAbstractItemView.SelectRows)
+            self.tabelas[tipo] = tb; self.abas.addTab(tb, titulo)
+        rodape = QHBoxLayout(); self.lbl_info = QLabel()
+        btn_zerar = QPushButton("Zerar estatísticas"); btn_zerar.clicked.connect(self.zerar)
+        rodape.addWidget(self.lbl_info); rodape.addStretch(); rodape.addWidget(btn_zerar)
+        l.addLayout(topo); l.addWidget(self.abas); l.addLayout(rodape); self.setLayout(l)
+        self.timer = QTimer(self); self.timer.setInterval(2000); self.timer.timeout.connect(self.atualizar); self.timer.start()
+        self.atualizar()
+
+    def ligar(self, ativo):
+        QSettings("MiizaSoft", "GestorObras").setValue("diagnostico", ativo)
+        self.db.instrumentar(diagnostico_salvo(self.sp_limite.value()) if ativo else None)
+        self.atualizar()
+
+    def mudar_limite(self, valor):
+        QSettings("MiizaSoft", "GestorObras").setValue("diagnostico_limite_ms", valor)
+        if self.db.diagnostico: self.db.diagnostico.limite_ms = valor
+
+    def zerar(self):
+        if self.db.diagnostico: self.db.diagnostico.zerar()
+        self.atualizar()
+
+    def atualizar(self):
+        diag = self.db.diagnostico
+        if diag is None:
+            for tb in self.tabelas.values(): tb.setRowCount(0)
+            self.lbl_info.setText("Medição desligada (sem custo para o programa)."); return
+        self.lbl_info.setText(f"Consultas lentas em: {os.path.abspath(diag.log_path)}")
+        for tipo, tb in self.tabelas.items():
+            linhas = diag.resumo(tipo); tb.setRowCount(len(linhas))
+            for r, (nome, n, total, p50, p95, mx, por_chamada) in enumerate(linhas):
+                it_nome = QTableWidgetItem(nome); it_nome.setToolTip(nome); tb.setItem(r, 0, it_nome)
+                for c, v in enumerate((f"{n}", f"{total:.1f}", f"{p50:.2f}", f"{p95:.2f}", f"{mx:.2f}", f"{por_chamada:.1f}"), 1):
+                    it = QTableWidgetItem(v); it.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter); tb.setItem(r, c, it)
+                if mx >= diag.limite_ms: tb.item(r, 5).setForeground(QColor("#F44336"))
+
+# --- 17. JANELA PRINCIPAL ---
+# Aba sob demanda: mostra um aviso leve e só constrói (e consulta o banco) na primeira vez em que é exibida
+class LazyTab(QWidget):
+    def __init__(self, fabrica):
+        super().__init__()
+        self.fabrica = fabrica; self.widget = None
+        self.lay = QVBoxLayout(self); self.lay.setContentsMargins(0, 0, 0, 0)
+        self.aviso = QLabel("Carregando..."); self.aviso.setAlignment(Qt.AlignCenter); self.lay.addWidget(self.aviso)
+
+    def get(self):
+        if self.widget is None:
+            self.widget = self.fabrica()
+            if hasattr(self.widget, "load_table_state"): self.widget.load_table_state()
+            self.aviso.deleteLater(); self.lay.addWidget(self.widget)
+        return self.widget
+
 class ConstructionApp(QMainWindow):
     def __init__(self, db, obra_data):
         super().__init__()
+        self.t_abertura = time.perf_counter(); self.primeira_pintura_ms = None
         self.db = db; self.obra_id = obra_data[0]; self.obra_nome = obra_data[1]
         try: self.setWindowIcon(QIcon(resource_path("icone_obra.ico")))
         except: pass
         self.resize(1200, 800); self.setup_ui(); self.status = self.statusBar(); self.update_footer()
+        # DIAGNÓSTICO: atalho sem item de menu (usado pelo suporte); fora do setup_ui, que roda de novo ao trocar de obra
+        action_diag = QAction("Diagnóstico", self); action_diag.setShortcut("Ctrl+Shift+D")
+        action_diag.triggered.connect(lambda: DiagnosticoDialog(self.db, self).exec()); self.addAction(action_diag)
         self.load_window_settings()
         
-        # CHECA ATUALIZAÇÃO AO INICIAR
+        # CHECA ATUALIZAÇÃO AO INICIAR (em segundo plano, com cache)
         self.updater = AutoUpdater(self)
-        if self.updater.check_updates():
-            self.updater.start_update()
+        self.updater.check_updates_async()
             
         # CARREGA O TEMA SALVO
         self.apply_theme(QSettings("MiizaSoft", "GestorObras").value("theme", "Escuro"))
@@ -1687,6 +1825,13 @@ class ConstructionApp(QMainWindow):
         
         file_menu = menu_bar.addMenu("☰ Menu")
         action_inactives = QAction("👥 Funcionários Inativos", self); action_inactives.triggered.connect(self.open_inactives); file_menu.addAction(action_inactives)
+        action_geral = QAction("📊 Visão Geral das Obras", self); action_geral.triggered.connect(self.open_portfolio); file_menu.addAction(action_geral)
+        nfe_menu = file_menu.addMenu("🧾 Importar NF-e (XML)")
+        nfe_menu.addAction("Arquivos...").triggered.connect(lambda: self.importar_nfe(pasta=False))
+        nfe_menu.addAction("Pasta...").triggered.connect(lambda: self.importar_nfe(pasta=True))
+        action_perf = QAction("⚡ Modo Desempenho (WAL)", self); action_perf.setCheckable(True)
+        action_perf.setChecked(self.db.desempenho); action_perf.toggled.connect(self.toggle_desempenho)
+        file_menu.addAction(action_perf)
         file_menu.addSeparator()
         action_change = QAction("🔄 Trocar Obra", self); action_change.triggered.connect(self.trocar_obra)
         file_menu.addAction(action_change)
@@ -1704,26 +1849,37 @@ class ConstructionApp(QMainWindow):
 
         self.tabs = QTabWidget()
         
-        self.tab_dashboard = DashboardTab(self.db, self.obra_id)
-        self.tab_calc = MaterialCalculator()
-        self.tab_stock = StockControl(self.db, self.obra_id)
-        self.tab_employees = EmployeeManager(self.db, self.obra_id)
-        self.tab_reports = ReportTab(self.db, self.obra_id)
-        self.tab_diary = DiaryTab(self.db, self.obra_id)
-        self.tab_finance = FinancialTab(self.db, self.obra_id)
-        self.tab_epi = EPITab(self.db, self.obra_id)
-        
-        self.tabs.addTab(self.tab_dashboard, "📊 Início")
-        self.tabs.addTab(self.tab_calc, "🧮 Calculadora")
-        self.tabs.addTab(self.tab_diary, "📘 Diário")
-        self.tabs.addTab(self.tab_finance, "💰 Financeiro")
-        self.tabs.addTab(self.tab_stock, "📦 Estoque")
-        self.tabs.addTab(self.tab_employees, "👷 Equipe")
-        self.tabs.addTab(self.tab_epi, "🦺 EPIs")
-        self.tabs.addTab(self.tab_reports, "📅 Relatórios")
+        # As abas só são construídas (e carregam seus dados) quando exibidas pela primeira vez
+        self.lazy_tabs = {
+            "dashboard": (lambda: DashboardTab(self.db, self.obra_id), "📊 Início"),
+            "calc": (MaterialCalculator, "🧮 Calculadora"),
+            "diary": (lambda: DiaryTab(self.db, self.obra_id), "📘 Diário"),
+            "finance": (lambda: FinancialTab(self.db, self.obra_id), "💰 Financeiro"),
+            "stock": (lambda: StockControl(self.db, self.obra_id), "📦 Estoque"),
+            "employees": (lambda: EmployeeManager(self.db, self.obra_id), "👷 Equipe"),
+            "epi": (lambda: EPITab(self.db, self.obra_id), "🦺 EPIs"),
+            "reports": (lambda: ReportTab(self.db, self.obra_id), "📅 Relatórios"),
+        }
+        for nome, (fabrica, titulo) in self.lazy_tabs.items():
+            self.lazy_tabs[nome] = LazyTab(fabrica); self.tabs.addTab(self.lazy_tabs[nome], titulo)
+        
+        self.in_busca = QLineEdit(); self.in_busca.setPlaceholderText("🔎 Buscar na obra..."); self.in_busca.setMinimumWidth(220)
+        self.in_busca.returnPressed.connect(self.abrir_busca)
+        self.tabs.setCornerWidget(self.in_busca, Qt.TopRightCorner)
         
         self.tabs.currentChanged.connect(self.on_tab_change)
         self.setCentralWidget(self.tabs)
+        QTimer.singleShot(0, lambda: self.on_tab_change(self.tabs.currentIndex()))
+
+    def aba(self, nome): return self.lazy_tabs[nome].get()
+
+    def abas_construidas(self): return [t.widget for t in self.lazy_tabs.values() if t.widget is not None]
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.primeira_pintura_ms is None:
+            self.primeira_pintura_ms = (time.perf_counter() - self.t_abertura) * 1000
+            self.status.showMessage(f"Janela aberta em {self.primeira_pintura_ms:.0f} ms", 5000)
 
     def apply_theme(self, theme_name):
         app = QApplication.instance()
@@ -1733,11 +1889,48 @@ class ConstructionApp(QMainWindow):
             app.setStyleSheet(THEME_DARK)
         QSettings("MiizaSoft", "GestorObras").setValue("theme", theme_name)
 
+    def toggle_desempenho(self, ativo):
+        QSettings("MiizaSoft", "GestorObras").setValue("db_desempenho", ativo)
+        QMessageBox.information(self, "Modo Desempenho", "A alteração será aplicada ao reiniciar o programa.")
+
     def on_tab_change(self, index):
-        if index == 0: self.tab_dashboard.load_data()
+        lazy = self.tabs.widget(index)
+        if lazy is None: return
+        if lazy.widget is None: lazy.get()
+        elif lazy is self.lazy_tabs["dashboard"]: lazy.widget.load_data()
+
+    def abrir_busca(self):
+        dialog = SearchDialog(self.db, self.obra_id, self.in_busca.text(), self)
+        if dialog.exec() == QDialog.Accepted and dialog.destino:
+            self.ir_para(*dialog.destino)
+
+    def ir_para(self, tabela, ref_id, data):
+        if tabela == "diario":
+            self.tabs.setCurrentWidget(self.lazy_tabs["diary"]); self.aba("diary").dt.setDate(QDate.fromString(data, "yyyy-MM-dd"))
+        elif tabela == "financeiro":
+            self.tabs.setCurrentWidget(self.lazy_tabs["finance"]); self.aba("finance").selecionar(ref_id)
+        elif tabela == "estoque":
+            self.tabs.setCurrentWidget(self.lazy_tabs["stock"]); self.aba("stock").selecionar_item(ref_id)
+        else:
+            self.tabs.setCurrentWidget(self.lazy_tabs["stock"]); self.aba("stock").selecionar_movimentacao(ref_id, data)
 
     def open_inactives(self):
-        dialog = InactiveEmployeesDialog(self.db, self.obra_id); dialog.exec(); self.tab_employees.ld()
+        dialog = InactiveEmployeesDialog(self.db, self.obra_id); dialog.exec()
+        if (equipe := self.lazy_tabs["employees"].widget) is not None: equipe.ld()
+
+    def importar_nfe(self, pasta):
+        if pasta: caminhos = [d] if (d := QFileDialog.getExistingDirectory(self, "Pasta com os XMLs das NF-e")) else []
+        else: caminhos, _ = QFileDialog.getOpenFileNames(self, "Importar NF-e", "", "NF-e (*.xml)")
+        if not caminhos: return
+        resumo = lambda r: (f"{r.importadas} notas importadas ({r.movimentacoes} entradas no estoque, {r.itens_criados} itens novos)"
+                            f", {r.repetidas} já importadas antes." + ("\nImportação interrompida: as notas acima foram gravadas." if r.interrompida else ""))
+        ImportDialog(self, self.db, "Importar NF-e", "importar_nfe", (self.obra_id, caminhos), resumo, ao_concluir=self.recarregar_abas)
+
+    def recarregar_abas(self):
+        # Depois de importações que mexem em estoque e financeiro: só as abas já construídas
+        if (estoque := self.lazy_tabs["stock"].widget) is not None: estoque.ref()
+        if (financeiro := self.lazy_tabs["finance"].widget) is not None: financeiro.load_data()
+        if (inicio := self.lazy_tabs["dashboard"].widget) is not None: inicio.load_data()
 
     def update_footer(self):
         self.status.clearMessage()
@@ -1749,10 +1942,17 @@ class ConstructionApp(QMainWindow):
     def trocar_obra(self):
         selector = ProjectSelector(self.db)
         if selector.exec() == QDialog.Accepted:
-            self.save_window_settings() 
-            nova_obra = selector.selected_obra
-            self.obra_id = nova_obra[0]; self.obra_nome = nova_obra[1]
-            self.setup_ui(); self.update_footer(); self.load_window_settings()
+            self.abrir_obra(selector.selected_obra)
+
+    def open_portfolio(self):
+        dialog = PortfolioDialog(self.db, self)
+        if dialog.exec() == QDialog.Accepted and dialog.selected_obra and dialog.selected_obra[0] != self.obra_id:
+            self.abrir_obra(dialog.selected_obra)
+
+    def abrir_obra(self, nova_obra):
+        self.save_window_settings() 
+        self.obra_id = nova_obra[0]; self.obra_nome = nova_obra[1]
+        self.setup_ui(); self.update_footer(); self.load_window_settings()
 
     def closeEvent(self, event):
         self.save_window_settings()
@@ -1762,22 +1962,19 @@ class ConstructionApp(QMainWindow):
         settings = QSettings("MiizaSoft", "GestorObras")
         settings.setValue("geometry", self.saveGeometry())
         settings.setValue("windowState", self.saveState())
-        self.tab_stock.save_table_state()
-        self.tab_employees.save_table_state()
-        self.tab_reports.save_table_state()
+        for aba in self.abas_construidas():
+            if hasattr(aba, "save_table_state"): aba.save_table_state()
 
     def load_window_settings(self):
         settings = QSettings("MiizaSoft", "GestorObras")
         if geo := settings.value("geometry"): self.restoreGeometry(geo)
         if state := settings.value("windowState"): self.restoreState(state)
-        self.tab_stock.load_table_state()
-        self.tab_employees.load_table_state()
-        self.tab_reports.load_table_state()
 
-# --- 15. EXECUÇÃO DO PROGRAMA ---
+# --- 18. EXECUÇÃO DO PROGRAMA ---
 if __name__ == "__main__":
     with contextlib.suppress(Exception):
         if sys.platform == "win32":
+            import ctypes
             myappid = 'miiza.gestor.obras.v32_0'
             ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
     
@@ -1800,7 +1997,8 @@ if __name__ == "__main__":
         app.setStyleSheet(THEME_DARK)
     # -----------------------------------------------------------------------
     
-    db = Database()
+    db = Database(desempenho=QSettings("MiizaSoft", "GestorObras").value("db_desempenho", False, type=bool))
+    if diag := diagnostico_salvo(): db.instrumentar(diag)
     selector = ProjectSelector(db)
     
     if selector.exec() == QDialog.Accepted:
@@ -0,0 +1,48 @@
+# Benchmark: tempo entre abrir a obra e a primeira pintura da janela, em bancos de tamanhos diferentes
+# Com as abas sob demanda o tempo não deve crescer com o volume de dados (só o dashboard é carregado).
+# Uso: QT_QPA_PLATFORM=offscreen python benchmarks/bench_abertura.py
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import GestorObras
+from PySide6.QtCore import QEvent
+from GestorObras import QApplication, Database, ConstructionApp
+
+GestorObras.AutoUpdater.check_updates_async = lambda self, forcar=False: None  # sem rede no benchmark
+
+
+def popular(db, n):
+    with db.transacao() as c:
+        c.execute("INSERT INTO obras (nome, endereco, data_inicio) VALUES ('Bench', '', '2024-01-01')")
+        c.executemany("INSERT INTO estoque (obra_id, item, categoria, unidade) VALUES (1, ?, 'Geral', 'Un')",
+                      ((f"Item {i}",) for i in range(max(n // 100, 10))))
+        c.executemany("INSERT INTO movimentacoes (item_id, data, tipo, quantidade, origem, destino) VALUES (?, date('2015-01-01', ?), 'entrada', 1, 'Depósito', 'Bloco A')",
+                      ((i % max(n // 100, 10) + 1, f"+{i % 3650} days") for i in range(n)))
+        c.executemany("INSERT INTO financeiro (obra_id, data, tipo, valor, descricao) VALUES (1, date('2015-01-01', ?), 'saida', 10, 'Lançamento')",
+                      ((f"+{i % 3650} days",) for i in range(n)))
+        c.executemany("INSERT INTO epi (obra_id, func_id, data, item) VALUES (1, 1, date('2015-01-01', ?), 'Luva')",
+                      ((f"+{i % 3650} days",) for i in range(n // 10)))
+
+
+def abrir(app, db, todas=False):
+    janela = ConstructionApp(db, (1, "Bench"))
+    if todas:  # comportamento antigo: todas as abas construídas antes de mostrar
+        for nome in janela.lazy_tabs: janela.aba(nome)
+    janela.show()
+    while janela.primeira_pintura_ms is None: app.processEvents()
+    ms = janela.primeira_pintura_ms
+    janela.close(); janela.deleteLater(); app.sendPostedEvents(None, QEvent.DeferredDelete)
+    return ms
+
+
+if __name__ == "__main__":
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"{'movimentações':>14} {'sob demanda':>12} {'todas as abas':>14}")
+    for n in (1000, 100000, 500000):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "bench.db"))
+            popular(db, n)
+            print(f"{n:>14} {abrir(app, db):>10.0f}ms {abrir(app, db, todas=True):>12.0f}ms")
+            db.close()
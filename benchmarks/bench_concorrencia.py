@@ -0,0 +1,75 @@
+# Benchmark: um único Database usado ao mesmo tempo pela "janela" (gravações) e por threads de leitura
+# (histórico paginado, folha, exportação em lotes), nos dois perfis. Cada thread recebe suas conexões;
+# no fim, o saldo de cada item precisa bater com as movimentações e nenhuma thread pode ter falhado.
+# Uso: python benchmarks/bench_concorrencia.py [segundos] [threads_leitura]   (padrão: 3 x 4)
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database
+
+
+def popular(db):
+    with db.transacao() as c:
+        c.execute("INSERT INTO obras (nome, endereco, data_inicio) VALUES ('Bench', '', '2024-01-01')")
+        c.executemany("INSERT INTO estoque (obra_id, item, categoria, unidade) VALUES (1, ?, 'Geral', 'Un')", ((f"Item {i:03d}",) for i in range(200)))
+        c.executemany("INSERT INTO funcionarios (obra_id, nome, funcao, ativo, valor_diaria) VALUES (1, ?, 'Pedreiro', 1, 150)", ((f"Func {i:03d}",) for i in range(100)))
+        c.executemany("INSERT INTO movimentacoes (item_id, data, tipo, quantidade, origem, destino) VALUES (?, date('2024-01-01', ?), 'entrada', 5, 'Depósito', '')",
+                      ((random.randint(1, 200), f"+{random.randint(0, 365)} days") for _ in range(50000)))
+        c.execute("UPDATE estoque SET quantidade = (SELECT COALESCE(SUM(quantidade), 0) FROM movimentacoes m WHERE m.item_id = estoque.id)")
+
+
+def leitor(db, tipo, parar, contagem, falhas):
+    try:
+        while not parar.is_set():
+            if tipo == 0: db.get_historico(1, limite=100)
+            elif tipo == 1: db.relatorio_periodo(1, "2024-01-01", "2024-12-31")
+            else:
+                for lote in db.iterar_lotes(*db.sql_historico(1)):
+                    db.get_estoque(1)  # consulta aninhada no meio da iteração: cursores independentes
+                    if parar.is_set(): break
+            contagem[tipo] += 1
+    except Exception as e:
+        falhas.append(f"{tipo}: {e!r}")
+    finally:
+        db.liberar()
+
+
+def rodar(path, desempenho, segundos, n_leitores):
+    db = Database(path, desempenho=desempenho); popular(db)
+    parar = threading.Event(); contagem = [0, 0, 0]; falhas = []
+    threads = [threading.Thread(target=leitor, args=(db, i % 3, parar, contagem, falhas)) for i in range(n_leitores)]
+    for t in threads: t.start()
+    latencias = []; fim = time.perf_counter() + segundos; i = 0
+    while time.perf_counter() < fim:
+        t0 = time.perf_counter()
+        if i % 2: db.movimentar_estoque(random.randint(1, 200), random.randint(1, 9), random.choice(["entrada", "saida"]), "2024-06-01", "", "", "")
+        else: db.salvar_presenca(random.randint(1, 100), f"2024-06-{i % 28 + 1:02d}", 1, 1)
+        latencias.append((time.perf_counter() - t0) * 1000); i += 1
+    parar.set()
+    for t in threads: t.join()
+    divergentes = db.conn.execute(f"""SELECT COUNT(*) FROM estoque e WHERE ABS(e.quantidade -
+                                      (SELECT COALESCE(SUM({db.MOV_SINAL}), 0) FROM movimentacoes m WHERE m.item_id = e.id)) > 1e-6""").fetchone()[0]
+    abertas = len(db.conexoes); db.close()
+    latencias.sort()
+    return latencias, contagem, falhas, divergentes, abertas
+
+
+if __name__ == "__main__":
+    random.seed(21)
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    n_leitores = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    print(f"{'Perfil':<11} {'gravações':>9} {'p50':>8} {'p95':>8} {'max':>9}   leituras (histórico/folha/exportação)")
+    for nome, desempenho in (("padrão", False), ("desempenho", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            lat, contagem, falhas, divergentes, abertas = rodar(os.path.join(tmp, "bench.db"), desempenho, segundos, n_leitores)
+            print(f"{nome:<11} {len(lat):>9} {statistics.median(lat):7.2f}ms {lat[int(len(lat) * 0.95)]:7.2f}ms {lat[-1]:8.2f}ms   "
+                  f"{contagem[0]}/{contagem[1]}/{contagem[2]}  (conexões abertas no fim: {abertas})")
+            assert not falhas, falhas
+            assert divergentes == 0, "saldo divergente das movimentações"
+    print("nenhuma falha nas threads; saldos conferidos")
@@ -0,0 +1,65 @@
+# Benchmark: latência por atualização do dashboard (5 consultas antigas x consulta única)
+# Uso: python benchmarks/bench_dashboard.py [funcionarios] [dias]   (padrão: 10k x 100 = 1M presenças)
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database
+
+
+def popular(db, n_func, n_dias):
+    with db.transacao() as c:
+        c.execute("INSERT INTO obras (nome, endereco, data_inicio) VALUES ('Bench', '', '2024-01-01')")
+        c.executemany("INSERT INTO funcionarios (obra_id, nome, funcao, ativo) VALUES (1, ?, 'Pedreiro', 1)",
+                      ((f"Funcionário {i:05d}",) for i in range(n_func)))
+        c.executemany("INSERT INTO presenca (func_id, data, manha, tarde) VALUES (?, date('2024-01-01', ?), ?, 1)",
+                      ((f + 1, f"+{d} days", (f + d) % 2) for d in range(n_dias) for f in range(n_func)))
+        c.executemany("INSERT INTO estoque (obra_id, item, unidade, quantidade) VALUES (1, ?, 'Saco', ?)",
+                      ((f"Item {i}", i % 10) for i in range(500)))
+        c.executemany("INSERT INTO financeiro (obra_id, data, tipo, valor) VALUES (1, '2024-01-01', ?, 10)",
+                      (("entrada" if i % 3 else "saida",) for i in range(10000)))
+        c.execute("INSERT INTO diario (obra_id, data, clima, atividades, ocorrencias) VALUES (1, '2024-02-01', 'Sol', 'Alvenaria', '')")
+    c.execute("ANALYZE")
+
+
+def dashboard_antigo(db, obra_id, data):
+    cur = db.read_conn.cursor()
+    cur.execute("SELECT SUM(CASE WHEN tipo='entrada' THEN valor ELSE -valor END) FROM financeiro WHERE obra_id=?", (obra_id,))
+    saldo = cur.fetchone()[0] or 0.0
+    cur.execute("""SELECT COUNT(DISTINCT p.func_id) FROM presenca p JOIN funcionarios f ON p.func_id = f.id
+                   WHERE f.obra_id=? AND p.data=? AND (p.manha=1 OR p.tarde=1)""", (obra_id, data))
+    count = cur.fetchone()[0] or 0
+    cur.execute("""SELECT DISTINCT f.nome FROM presenca p JOIN funcionarios f ON p.func_id = f.id
+                   WHERE f.obra_id=? AND p.data=? AND (p.manha=1 OR p.tarde=1) ORDER BY f.nome ASC""", (obra_id, data))
+    nomes = [r[0] for r in cur.fetchall()]
+    cur.execute("""SELECT item, quantidade, unidade FROM estoque
+                   WHERE obra_id=? AND alerta_on=1 AND quantidade < alerta_qtd ORDER BY quantidade ASC""", (obra_id,))
+    baixo = cur.fetchall()
+    cur.execute("SELECT clima, atividades, ocorrencias FROM diario WHERE obra_id=? AND data=?", (obra_id, data))
+    return saldo, count, baixo, cur.fetchone(), nomes
+
+
+def medir(func, repeticoes=30):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter(); func(); tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tempos), max(tempos)
+
+
+if __name__ == "__main__":
+    n_func = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n_dias = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        t0 = time.perf_counter(); popular(db, n_func, n_dias)
+        print(f"{n_func} funcionários, {n_func * n_dias} presenças (carga em {time.perf_counter() - t0:.1f}s)")
+        data = "2024-02-01"
+        antigo, novo = dashboard_antigo(db, 1, data), db.get_dashboard_stats(1, data)
+        assert tuple(antigo) == tuple(novo), "resultados divergentes"
+        for nome, func in (("5 consultas", lambda: dashboard_antigo(db, 1, data)),
+                           ("consulta única", lambda: db.get_dashboard_stats(1, data))):
+            p50, pmax = medir(func)
+            print(f"{nome:<16} p50 {p50:8.2f}ms   max {pmax:8.2f}ms")
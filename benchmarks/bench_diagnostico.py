@@ -0,0 +1,88 @@
+# Benchmark: custo do diagnóstico de desempenho (tempos por método/comando SQL + log de consultas lentas)
+# Compara nunca ligado x ligado x desligado de novo (deve voltar ao custo zero), e confere estatísticas,
+# EXPLAIN QUERY PLAN no log, rotação do arquivo e medição em outra thread.
+# Uso: python benchmarks/bench_diagnostico.py [movimentacoes]   (padrão: 300000)
+import glob
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database, Diagnostico
+
+
+def popular(db, n_mov):
+    with db.transacao() as c:
+        c.execute("INSERT INTO obras (nome, endereco, data_inicio) VALUES ('Bench', '', '2024-01-01')")
+        c.executemany("INSERT INTO estoque (obra_id, item, categoria, unidade) VALUES (1, ?, 'Geral', 'Un')", ((f"Item {i:03d}",) for i in range(300)))
+        c.executemany("INSERT INTO funcionarios (obra_id, nome, funcao, ativo, valor_diaria) VALUES (1, ?, 'Pedreiro', 1, 150)", ((f"Func {i:03d}",) for i in range(100)))
+        c.executemany("INSERT INTO presenca (func_id, data, manha, tarde) VALUES (?, date('2024-01-01', ?), 1, 1)",
+                      ((f, f"+{d} days") for f in range(1, 101) for d in range(0, 365, 2)))
+        c.executemany("INSERT INTO movimentacoes (item_id, data, tipo, quantidade, origem, destino) VALUES (?, date('2024-01-01', ?), 'entrada', 5, 'Depósito', '')",
+                      ((random.randint(1, 300), f"+{random.randint(0, 365)} days") for _ in range(n_mov)))
+    db.conn.execute("ANALYZE")
+
+
+CASOS = {
+    "get_historico (página)": lambda db: db.get_historico(1, limite=200),
+    "get_historico filtrado": lambda db: db.get_historico(1, "Item 01", "Dep", "Entrada", limite=200),
+    "get_estoque": lambda db: db.get_estoque(1),
+    "get_material_by_id": lambda db: db.get_material_by_id(7),
+    "relatorio_periodo": lambda db: db.relatorio_periodo(1, "2024-03-01", "2024-03-31"),
+    "get_dashboard_stats": lambda db: db.get_dashboard_stats(1, "2024-06-01"),
+    "movimentar_estoque": lambda db: db.movimentar_estoque(5, 1, "entrada", "2024-12-31", "", "", ""),
+    "iterar_lotes (tudo)": lambda db: sum(len(l) for l in db.iterar_lotes(*db.sql_historico(1))),
+}
+
+
+def medir(db, repeticoes=30):
+    res = {}
+    for nome, func in CASOS.items():
+        tempos = []
+        for _ in range(repeticoes):
+            t0 = time.perf_counter(); func(db); tempos.append((time.perf_counter() - t0) * 1000)
+        res[nome] = statistics.median(tempos)
+    return res
+
+
+if __name__ == "__main__":
+    random.seed(23)
+    n_mov = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db")); popular(db, n_mov)
+        log = os.path.join(tmp, "lentas.log")
+
+        medir(db, 3)  # aquece o cache de páginas antes da primeira medição
+        desligado = medir(db)
+        diag = Diagnostico(log, limite_ms=20)
+        db.instrumentar(diag); ligado = medir(db)
+        db.instrumentar(None); de_novo = medir(db)
+        assert type(db.conn).__name__ == "Connection" and "get_estoque" not in db.__dict__, "desligar deixou instrumentação"
+        print(f"{'caso':<24} {'nunca ligado':>12} {'ligado':>9} {'desligado':>10}")
+        for nome in CASOS:
+            print(f"{nome:<24} {desligado[nome]:10.3f}ms {ligado[nome]:7.3f}ms {de_novo[nome]:8.3f}ms   "
+                  f"({(ligado[nome] / desligado[nome] - 1) * 100:+.0f}% ligado)")
+
+        metodos = {r[0]: r for r in diag.resumo("método")}
+        sqls = diag.resumo("sql")
+        assert metodos["get_historico"][1] == 60 and metodos["get_historico"][6] == 200, metodos["get_historico"]
+        assert metodos["movimentar_estoque"][1] == 30 and "iterar_lotes" not in metodos
+        assert any(nome.startswith("BEGIN IMMEDIATE") for nome, *_ in sqls)
+        lotes = next(r for r in sqls if r[0].startswith("SELECT m.id") and r[1] == 30 and r[6] > n_mov)  # iterar_lotes: soma de todos os fetchmany
+        print(f"estatísticas: {len(metodos)} métodos, {len(sqls)} comandos; histórico completo p50 {lotes[3]:.0f}ms p95 {lotes[4]:.0f}ms")
+        with open(log, encoding="utf-8") as f: texto = f.read()
+        assert "SCAN" in texto or "SEARCH" in texto, "log sem EXPLAIN QUERY PLAN"
+        print("log de lentas com plano, ex.:\n" + "\n".join(texto.split("\n")[:6]))
+
+        # Outra thread: conexão própria já instrumentada
+        diag2 = Diagnostico(log, limite_ms=0); db.instrumentar(diag2)
+        t = threading.Thread(target=lambda: (db.get_estoque(1), db.liberar())); t.start(); t.join()
+        assert diag2.resumo("método")[0][0] == "get_estoque" and diag2.resumo("sql")
+        # Rotação: tudo acima de 0 ms vai para o log até passar de 1 MB algumas vezes
+        while len(glob.glob(log + ".*")) < 2: db.get_historico(1, limite=200)
+        print(f"rotação: {sorted(os.path.basename(p) for p in glob.glob(log + '*'))}")
+        db.instrumentar(None); db.close()
@@ -0,0 +1,77 @@
+# Benchmark: saldo do estoque em uma data -> reprocessar todas as movimentações x checkpoints mensais
+# Também confere o resultado após movimentações retroativas (que invalidam os checkpoints).
+# Uso: python benchmarks/bench_estoque_data.py [itens] [movimentacoes]   (padrão: 300 x 1M em 5 anos)
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database
+
+HOJE = "2025-01-15"
+
+
+def popular(db, n_itens, n_mov):
+    with db.transacao() as c:
+        c.execute("INSERT INTO obras (nome, endereco, data_inicio) VALUES ('Bench', '', '2020-01-01')")
+        c.executemany("INSERT INTO estoque (obra_id, item, categoria, unidade) VALUES (1, ?, 'Geral', 'Un')",
+                      ((f"Item {i:03d}",) for i in range(n_itens)))
+        c.executemany("INSERT INTO movimentacoes (item_id, data, tipo, quantidade, origem, destino) VALUES (?, date('2020-01-01', ?), ?, ?, '', '')",
+                      ((random.randint(1, n_itens), f"+{random.randint(0, 5 * 365 + 14)} days",
+                        random.choice(["entrada", "entrada", "saida", "uso_interno"]), random.randint(1, 50)) for _ in range(n_mov)))
+        # saldo atual coerente com as movimentações + um ajuste manual (Editar Item) em alguns itens
+        c.execute(f"""UPDATE estoque SET quantidade = (SELECT COALESCE(SUM({db.MOV_SINAL}), 0) FROM movimentacoes m WHERE m.item_id = estoque.id)
+                      + CASE WHEN id % 10 = 0 THEN 7 ELSE 0 END""")
+    c.execute("ANALYZE")
+
+
+def reprocessar(db, data):
+    # Sem checkpoints: percorre todas as movimentações posteriores à data de cada item
+    return db.read_conn.execute(f"""
+        SELECT e.id, ROUND(e.quantidade - (SELECT COALESCE(SUM({db.MOV_SINAL}), 0) FROM movimentacoes m
+                                           WHERE m.item_id = e.id AND m.data > ?), 4)
+        FROM estoque e WHERE e.obra_id = 1 ORDER BY e.item""", (data,)).fetchall()
+
+
+def com_checkpoints(db, data):
+    db.atualizar_snapshots(1, HOJE)
+    return [(r[0], r[5]) for r in db.read_conn.execute(*db.sql_estoque(1, data)).fetchall()]
+
+
+def medir(func, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter(); func(); tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tempos)
+
+
+if __name__ == "__main__":
+    random.seed(11)
+    n_itens = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    n_mov = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        t0 = time.perf_counter(); popular(db, n_itens, n_mov)
+        print(f"{n_itens} itens, {n_mov} movimentações (carga em {time.perf_counter() - t0:.1f}s)")
+        t0 = time.perf_counter(); db.atualizar_snapshots(1, HOJE)
+        n_ck = db.conn.execute("SELECT COUNT(*) FROM estoque_snapshot").fetchone()[0]
+        print(f"checkpoints criados: {n_ck} em {(time.perf_counter() - t0) * 1000:.0f}ms")
+
+        datas = ["2020-03-10", "2022-06-30", "2024-12-31", "2025-01-10"]
+        for d in datas:
+            assert reprocessar(db, d) == com_checkpoints(db, d), f"divergência em {d}"
+            print(f"saldo em {d}: reprocessando {medir(lambda: reprocessar(db, d)):7.1f}ms   "
+                  f"checkpoints {medir(lambda: com_checkpoints(db, d)):6.1f}ms")
+
+        # Movimentações retroativas: inserção, exclusão e alteração de data
+        db.movimentar_estoque(5, 1000, "entrada", "2021-02-14", "Retroativa", "", "")
+        db.excluir_movimentacao(db.conn.execute("SELECT id FROM movimentacoes WHERE item_id = 7 AND data < '2022-01-01' LIMIT 1").fetchone()[0])
+        with db.transacao(): db.conn.execute("UPDATE movimentacoes SET data = '2020-05-05' WHERE id IN (SELECT id FROM movimentacoes WHERE item_id = 9 LIMIT 3)")
+        t0 = time.perf_counter(); db.atualizar_snapshots(1, HOJE)
+        print(f"após 3 edições retroativas: checkpoints refeitos em {(time.perf_counter() - t0) * 1000:.0f}ms")
+        for d in datas:
+            assert reprocessar(db, d) == com_checkpoints(db, d), f"divergência após edição retroativa em {d}"
+        print("resultados conferidos após as edições retroativas")
@@ -0,0 +1,74 @@
+# Benchmark: relatório de folha (LEFT JOIN em todas as presenças + soma em Python) x resumo mensal + totais no SQL
+# Uso: python benchmarks/bench_folha.py [funcionarios] [anos]   (padrão: 300 x 5 anos)
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database
+
+
+def popular(db, n_func, anos):
+    with db.transacao() as c:
+        c.execute("INSERT INTO obras (nome, endereco, data_inicio) VALUES ('Bench', '', '2020-01-01')")
+        c.executemany("INSERT INTO funcionarios (obra_id, nome, funcao, ativo, valor_diaria) VALUES (1, ?, 'Pedreiro', 1, ?)",
+                      ((f"Funcionário {i:04d}", random.choice([120.0, 150.0, 180.5, None])) for i in range(n_func)))
+        # mesmo upsert usado pela tela: os triggers mantêm o resumo mensal
+        c.executemany("""INSERT INTO presenca (func_id, data, manha, tarde) VALUES (?, date('2020-01-01', ?), ?, ?)
+                         ON CONFLICT(func_id, data) DO UPDATE SET manha=excluded.manha, tarde=excluded.tarde""",
+                      ((f + 1, f"+{d} days", random.randint(0, 1), random.randint(0, 1))
+                       for d in range(anos * 365) for f in range(n_func) if random.random() < 0.8))
+    c.execute("ANALYZE")
+
+
+def folha_antiga(db, obra_id, d1, d2):
+    linhas = db.read_conn.execute("""
+        SELECT f.nome, f.funcao, f.data_admissao, f.telefone,
+               SUM(COALESCE(p.manha, 0) + COALESCE(p.tarde, 0)) * 0.5 as dias,
+               f.cpf, f.rg, f.banco, f.agencia, f.conta, f.valor_diaria
+        FROM funcionarios f
+        LEFT JOIN presenca p ON f.id=p.func_id AND p.data BETWEEN ? AND ?
+        WHERE f.obra_id = ?
+        GROUP BY f.id ORDER BY f.nome ASC""", (d1, d2, obra_id)).fetchall()
+    total = sum((r[4] or 0.0) * (r[10] or 0.0) for r in linhas)
+    return [(r[0], r[4]) for r in linhas], round(total, 2)
+
+
+def folha_nova(db, obra_id, d1, d2):
+    linhas = db.relatorio_periodo(obra_id, d1, d2)
+    return [(r[0], r[4]) for r in linhas], round(linhas[0][12] if linhas else 0.0, 2)
+
+
+def medir(func, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter(); func(); tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tempos)
+
+
+if __name__ == "__main__":
+    random.seed(3)
+    n_func = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    anos = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        t0 = time.perf_counter(); popular(db, n_func, anos)
+        total = db.conn.execute("SELECT COUNT(*) FROM presenca").fetchone()[0]
+        print(f"{n_func} funcionários, {total} presenças (carga em {time.perf_counter() - t0:.1f}s)")
+
+        # Edições depois da carga (remarcações, exclusões) também precisam refletir no resumo
+        with db.transacao():
+            db.conn.execute("UPDATE presenca SET manha = 1 - manha WHERE id % 7 = 0")
+            db.conn.execute("DELETE FROM presenca WHERE id % 11 = 0")
+            db.conn.execute("UPDATE OR IGNORE presenca SET data = date(data, '+1 year') WHERE id % 13 = 0 AND data < '2021-01-01'")
+
+        periodos = [("mês fechado", "2023-06-01", "2023-06-30"), ("quinzena", "2023-06-10", "2023-06-24"),
+                    ("vira o mês", "2023-05-20", "2023-07-10"), ("todo o histórico", "2020-01-01", "2024-12-31"),
+                    ("ano quebrado", "2021-03-15", "2022-03-14")]
+        for nome, d1, d2 in periodos:
+            assert folha_antiga(db, 1, d1, d2) == folha_nova(db, 1, d1, d2), f"divergência em {nome}"
+            antigo, novo = medir(lambda: folha_antiga(db, 1, d1, d2)), medir(lambda: folha_nova(db, 1, d1, d2))
+            print(f"{nome:<18} antigo {antigo:8.1f}ms   resumo mensal {novo:7.1f}ms")
@@ -0,0 +1,110 @@
+# Benchmark: importação de movimentações por CSV -> movimentar_estoque linha a linha x importar_movimentacoes
+# Confere saldos, itens criados, linhas com erro e o cancelamento (nada gravado).
+# Uso: python benchmarks/bench_importacao.py [linhas] [itens]   (padrão: 100000 x 500)
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database
+
+TIPOS = ["entrada", "entrada", "Saída", "uso interno", "saida"]
+# quantidade no CSV -> valor lido (None: a linha vira erro, sem adivinhar)
+QUANTIDADES = {"12,5": 12.5, "12.5": 12.5, "10": 10.0, "1234,5": 1234.5, "1.000,5": 1000.5, "1,000.5": 1000.5,
+               "1.000": 1000.0, "1.234.567": 1234567.0, "2.500.000,75": 2500000.75, "1,234,567.25": 1234567.25,
+               "0,500": 0.5, "1,000": None, "1,5.0": None, "1,5,0": None, "1.000.5": None, "12.34.56": None,
+               "1.000.000,5.0": None, "abc": None, "-3": None, "0": None}
+
+
+def gerar_csv(path, n_linhas, n_itens, erros=0):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(["Data", "Item", "Categoria", "Quantidade", "Tipo", "Origem", "Destino", "NF"])
+        for i in range(n_linhas):
+            dia = f"{random.randint(1, 28):02d}/{random.randint(1, 12):02d}/2024" if i % 2 else f"2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
+            w.writerow([dia, f"Item {random.randint(0, n_itens - 1):04d}", "Geral", f"{random.randint(1, 500)},5",
+                        random.choice(TIPOS), "Fornecedor", "Obra", f"NF {i}"])
+        for i in range(erros):
+            w.writerow(["31/02/2024", "Item X", "Geral", "1", "entrada"] if i % 3 == 0 else
+                       ["2024-01-01", "", "Geral", "1", "entrada"] if i % 3 == 1 else
+                       ["2024-01-01", "Item X", "Geral", "abc", "devolucao"])
+
+
+def conferir_quantidades():
+    for texto, esperado in QUANTIDADES.items():
+        try: lido = Database.ler_linha_importacao(["2024-01-01", "Item", "Geral", texto, "entrada"])[3]
+        except ValueError: lido = None
+        assert lido == esperado, f"quantidade '{texto}': lida {lido}, esperada {esperado}"
+
+
+def linha_a_linha(db, obra_id, path):
+    # O que a tela faz hoje: um movimentar_estoque (UPDATE + INSERT + commit) por linha
+    itens = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        r = csv.reader(f, delimiter=";"); next(r)
+        for campos in r:
+            data, item, cat, q, tipo, origem, destino, nf = db.ler_linha_importacao(campos)
+            if (item_id := itens.get(item.casefold())) is None:
+                item_id = itens[item.casefold()] = db.add_material(obra_id, item, cat, "Unidade")
+            db.movimentar_estoque(item_id, q, tipo, data, origem, destino, nf)
+
+
+def gatilhos(db):
+    return db.conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='trigger' AND tbl_name='movimentacoes'").fetchone()[0]
+
+
+def conferir(db, obra_id):
+    # Saldo de cada item deve bater com a soma das movimentações
+    return db.conn.execute(f"""SELECT COUNT(*) FROM estoque e WHERE obra_id=? AND ABS(e.quantidade -
+                               (SELECT COALESCE(SUM({db.MOV_SINAL}), 0) FROM movimentacoes m WHERE m.item_id = e.id)) > 1e-6""",
+                           (obra_id,)).fetchone()[0]
+
+
+if __name__ == "__main__":
+    random.seed(19)
+    conferir_quantidades(); print(f"formatos de quantidade conferidos ({len(QUANTIDADES)} casos)")
+    n_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    n_itens = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        for o in ("Linha a linha", "Importação", "Cancelada"): db.criar_obra(o, "")
+        csv_grande, csv_amostra = os.path.join(tmp, "grande.csv"), os.path.join(tmp, "amostra.csv")
+        gerar_csv(csv_grande, n_linhas, n_itens, erros=30)
+        gerar_csv(csv_amostra, 2000, n_itens)
+
+        t0 = time.perf_counter(); linha_a_linha(db, 1, csv_amostra); ms = (time.perf_counter() - t0) * 1000
+        print(f"linha a linha : 2000 linhas em {ms:.0f}ms (~{ms * n_linhas / 2000 / 1000:.1f}s estimados para {n_linhas})")
+
+        # Checkpoints já calculados: a importação retroativa (2024) precisa invalidá-los
+        db.movimentar_estoque(db.add_material(2, "Item 0000", "Geral", "Unidade"), 1, "entrada", "2023-05-05", "", "", "")
+        db.atualizar_snapshots(2, "2025-01-15")
+        n_gatilhos = gatilhos(db)
+
+        t0 = time.perf_counter(); res = db.importar_movimentacoes(2, csv_grande)
+        print(f"importação    : {res.importadas} linhas em {(time.perf_counter() - t0) * 1000:.0f}ms, "
+              f"{res.itens_criados} itens criados, {res.total_erros} erros")
+        assert res.importadas == n_linhas and res.total_erros == 30 and res.itens_criados == n_itens - 1
+        assert conferir(db, 1) == 0 and conferir(db, 2) == 0, "saldo divergente das movimentações"
+        assert gatilhos(db) == n_gatilhos, "triggers não foram recriados"
+        assert not db.conn.execute("SELECT 1 FROM estoque_snapshot WHERE data >= '2024-01-01'").fetchone(), "checkpoint não invalidado"
+        fts = db.conn.execute("SELECT COUNT(*) FROM movimentacoes_fts WHERE movimentacoes_fts MATCH 'fornecedor'").fetchone()[0]
+        assert fts == n_linhas + 2000, "busca não indexou as linhas importadas"
+        print("saldos, triggers, checkpoints e busca conferidos; primeiros erros:", res.erros[:3])
+
+        # Cancelamento no último lote (arquivo todo lido): nada gravado; mede também o pico de memória
+        antes = db.conn.execute("SELECT COUNT(*) FROM movimentacoes").fetchone()[0]
+        chamadas = []
+        tracemalloc.start()
+        try:
+            db.importar_movimentacoes(3, csv_grande, cancelar=lambda: chamadas.append(1) or len(chamadas) > n_linhas // 5000)
+        except InterruptedError:
+            pass
+        pico = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+        depois = db.conn.execute("SELECT COUNT(*) FROM movimentacoes").fetchone()[0]
+        itens_obra3 = db.conn.execute("SELECT COUNT(*) FROM estoque WHERE obra_id = 3").fetchone()[0]
+        assert antes == depois and itens_obra3 == 0 and gatilhos(db) == n_gatilhos, "cancelamento deixou dados gravados"
+        print(f"cancelamento: nada gravado (pico de memória lendo o arquivo todo: {pico / 2**20:.1f} MB)")
@@ -0,0 +1,65 @@
+# Benchmark: digitar "cimento" no filtro do histórico com muitas movimentações
+# Compara a consulta síncrona a cada tecla (comportamento antigo) com o LiveFilter (debounce + thread).
+# Uso: QT_QPA_PLATFORM=offscreen python benchmarks/bench_live_filter.py [movimentacoes]
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GestorObras import QApplication, Database, StockControl
+
+INTERVALO_TECLAS = 0.08  # ~12 teclas/s
+
+
+def popular(db, n):
+    nomes = ["Cimento CP-II", "Areia Média", "Brita 1", "Tijolo 8 furos", "Cal", "Vergalhão 10mm"]
+    with db.transacao():
+        db.conn.executemany("INSERT INTO estoque (obra_id, item, categoria, unidade) VALUES (1, ?, 'Geral', 'Un')",
+                            ((f"{nomes[i % len(nomes)]} {i}",) for i in range(300)))
+        db.conn.executemany("INSERT INTO movimentacoes (item_id, data, tipo, quantidade, origem, destino) VALUES (?, ?, 'entrada', 1, 'Depósito Central', 'Bloco A')",
+                            ((random.randint(1, 300), f"{random.randint(2015, 2025)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}") for _ in range(n)))
+
+
+def digitar(app, aba, texto):
+    bloqueio_max, t_ultima = 0.0, 0.0
+    aba.f_item.clear()
+    for i in range(1, len(texto) + 1):
+        t0 = time.perf_counter()
+        aba.f_item.setText(texto[:i])
+        bloqueio_max = max(bloqueio_max, time.perf_counter() - t0)
+        t_ultima = time.perf_counter()
+        fim = t_ultima + INTERVALO_TECLAS
+        while time.perf_counter() < fim: app.processEvents()
+    return bloqueio_max * 1000, t_ultima
+
+
+if __name__ == "__main__":
+    random.seed(7)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        popular(db, n)
+        aba = StockControl(db, 1); aba.show()
+
+        # Comportamento antigo: consulta + repintura no thread da GUI a cada tecla
+        aba.f_item.textChanged.disconnect()
+        aba.f_item.textChanged.connect(aba.load_history)
+        bloqueio, t_ultima = digitar(app, aba, "cimento")
+        print(f"síncrono     : 7 consultas, maior travamento por tecla {bloqueio:7.1f}ms")
+
+        # LiveFilter: debounce + consulta em thread + descarte de resultados obsoletos
+        aba.f_item.clear()
+        aba.f_item.textChanged.disconnect()
+        aba.f_item.textChanged.connect(lambda: aba.filtro_h.agendar(*aba.filtros_historico()))
+        consultas = []
+        original = aba.model_h.primeira_pagina
+        aba.filtro_h.consulta = lambda db_, *f: (consultas.append(f), original(db_, *f))[1]
+        bloqueio, t_ultima = digitar(app, aba, "cimento")
+        while aba.model_h.filtros[0] != "cimento": app.processEvents()
+        aba.tb_h.viewport().repaint()
+        latencia = (time.perf_counter() - t_ultima) * 1000
+        print(f"LiveFilter   : {len(consultas)} consulta(s), maior travamento por tecla {bloqueio:7.1f}ms, "
+              f"última tecla → pintura {latencia:6.1f}ms (debounce de {aba.filtro_h.timer.interval()}ms incluso)")
@@ -0,0 +1,62 @@
+# Benchmark: fechamento do mês em lote (python -m nucleo.lote) no banco sintético da suíte: todas as obras em
+# série x em processos paralelos, conferindo que os CSVs são idênticos, que o banco não foi alterado (somente
+# leitura) e que o saldo na data sem checkpoints bate com o da janela (com checkpoints).
+# Uso: python benchmarks/bench_lote.py [escala]   (padrão: medio; o banco fica em cache, como na suite.py)
+import filecmp
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database
+from nucleo.lote import gerar
+from dados_sinteticos import ESCALAS, gerar as gerar_sintetico
+
+D1, D2 = "2025-11-01", "2025-11-30"
+
+
+def md5(path):
+    with open(path, "rb") as f: return hashlib.md5(f.read()).hexdigest()
+
+
+def iguais(a, b):
+    comp = filecmp.dircmp(a, b)
+    return not (comp.left_only or comp.right_only or comp.diff_files) and all(iguais(os.path.join(a, d), os.path.join(b, d)) for d in comp.common_dirs)
+
+
+def rodar(banco, saida, processos):
+    t0 = time.perf_counter(); res = list(gerar(banco, D1, D2, saida, processos=processos))
+    assert not any(r.erro for r in res), [r.erro for r in res if r.erro]
+    return (time.perf_counter() - t0) * 1000, res
+
+
+if __name__ == "__main__":
+    escala = sys.argv[1] if len(sys.argv) > 1 else "medio"
+    banco = os.path.join(tempfile.gettempdir(), f"gestor_sintetico_{escala}_42.db")
+    if not os.path.exists(banco):
+        print(f"gerando banco sintético '{escala}' em {banco}")
+        db = Database(banco); gerar_sintetico(db, escala, 42); db.close()
+    antes = md5(banco); paralelo = max(2, min(os.cpu_count() or 1, ESCALAS[escala]["obras"]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ms_serie, res = rodar(banco, os.path.join(tmp, "serie"), 1)
+        ms_par, _ = rodar(banco, os.path.join(tmp, "paralelo"), paralelo)
+        assert iguais(os.path.join(tmp, "serie"), os.path.join(tmp, "paralelo")), "CSVs diferentes entre série e paralelo"
+        assert md5(banco) == antes, "o modo em lote alterou o banco"
+        linhas = sum(sum(r.linhas.values()) for r in res)
+        print(f"{len(res)} obras, {linhas} linhas de CSV ({D1} a {D2})")
+        print(f"{'em série':<14}: {ms_serie:7.0f}ms")
+        print(f"{f'{paralelo} processos':<14}: {ms_par:7.0f}ms  (núcleos: {os.cpu_count()})")
+
+        # Saldo na data: somente leitura (sem checkpoints) x janela (checkpoints criados antes da consulta)
+        copia = os.path.join(tmp, "copia.db"); shutil.copy(banco, copia)
+        ro = Database(banco, somente_leitura=True); rw = Database(copia)
+        for data in ("2024-06-30", "2025-06-30", D2):
+            t0 = time.perf_counter(); a = ro.get_estoque(1, data); ms_ro = (time.perf_counter() - t0) * 1000
+            t0 = time.perf_counter(); b = rw.get_estoque(1, data); ms_rw = (time.perf_counter() - t0) * 1000
+            assert a == b, data
+            print(f"saldo em {data}: somente leitura {ms_ro:6.1f}ms   janela (com checkpoints) {ms_rw:6.1f}ms   iguais")
+        ro.close(); rw.close()
@@ -0,0 +1,96 @@
+# Benchmark: importação de uma pasta de NF-e (XML) -> estoque + financeiro
+# Gera notas no layout da SEFAZ (nfeProc/NFe/infNFe), com repetidas, quebradas e uma nota grande; confere
+# saldos, financeiro, reimportação (tudo pulado pela chave) e a resposta da janela durante a importação em QThread.
+# Uso: QT_QPA_PLATFORM=offscreen python benchmarks/bench_nfe.py [notas]   (padrão: 3000)
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database, ler_nfe
+
+PRODUTOS = [("Cimento CP II 50kg", "SC"), ("Areia média", "M3"), ("Brita 1", "M3"), ("Tijolo 8 furos", "MIL"),
+            ("Vergalhão 10mm", "BR"), ("Tubo PVC 100mm", "UN"), ("Fio 2,5mm", "RL"), ("Tinta acrílica 18L", "LT")]
+
+
+def chave(n):
+    return f"35240{n:039d}"
+
+
+def xml_nfe(n, itens):
+    dets = "".join(f"""
+        <det nItem="{i}"><prod><cProd>{i}</cProd><xProd>{nome}</xProd><uCom>{un}</uCom><qCom>{q:.4f}</qCom>
+        <vUnCom>{v:.2f}</vUnCom><vProd>{q * v:.2f}</vProd></prod><imposto><ICMS><ICMS00><vICMS>0.00</vICMS></ICMS00></ICMS></imposto></det>"""
+                   for i, (nome, un, q, v) in enumerate(itens, 1))
+    total = sum(q * v for _, _, q, v in itens)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe" versao="4.00"><NFe><infNFe Id="NFe{chave(n)}" versao="4.00">
+    <ide><cUF>35</cUF><nNF>{n}</nNF><dhEmi>2024-{n % 12 + 1:02d}-{n % 28 + 1:02d}T10:00:00-03:00</dhEmi><tpNF>1</tpNF></ide>
+    <emit><CNPJ>00000000000191</CNPJ><xNome>Depósito {n % 7}</xNome><enderEmit><xNome>ignorar</xNome></enderEmit></emit>
+    <dest><xNome>Construtora</xNome></dest>{dets}
+    <total><ICMSTot><vProd>{total:.2f}</vProd><vNF>{total:.2f}</vNF></ICMSTot></total>
+</infNFe></NFe><protNFe><infProt><chNFe>{chave(n)}</chNFe></infProt></protNFe></nfeProc>"""
+
+
+def gerar_pasta(pasta, n_notas):
+    esperado = {"movs": 0, "valor": 0.0}
+    os.makedirs(os.path.join(pasta, "2024"), exist_ok=True)
+    for n in range(n_notas):
+        itens = [(*random.choice(PRODUTOS), random.randint(1, 40), random.randint(5, 90)) for _ in range(random.randint(1, 12))]
+        if n == 0: itens = [(f"Item avulso {i}", "UN", 1, 1.5) for i in range(990)]  # nota no limite de itens
+        with open(os.path.join(pasta, "2024" if n % 2 else "", f"{chave(n)}-nfe.xml"), "w", encoding="utf-8") as f:
+            f.write(xml_nfe(n, itens))
+        esperado["movs"] += len(itens); esperado["valor"] += round(sum(q * v for _, _, q, v in itens), 2)
+    shutil.copy(os.path.join(pasta, f"{chave(2)}-nfe.xml"), os.path.join(pasta, "copia.xml"))  # mesma nota em dois arquivos
+    with open(os.path.join(pasta, "quebrada.xml"), "w") as f: f.write("<nfeProc><NFe><infNFe")
+    with open(os.path.join(pasta, "outro.xml"), "w") as f: f.write("<cte/>")
+    return esperado
+
+
+def importar_em_thread(app, db, pasta):
+    # Mede o maior intervalo entre ticks de um timer de 10ms na thread da janela enquanto o worker importa
+    w = ImportWorker(db, "importar_nfe", (1, [pasta])); res = {}; ticks = [time.perf_counter()]
+    w.concluido.connect(lambda r: res.setdefault("r", r)); w.error.connect(lambda m: res.setdefault("erro", m))
+    timer = QTimer(); timer.timeout.connect(lambda: ticks.append(time.perf_counter())); timer.start(10)
+    t0 = time.perf_counter(); w.start()
+    while not res: app.processEvents(); time.sleep(0.001)
+    w.wait(); timer.stop()
+    return res, (time.perf_counter() - t0) * 1000, max(b - a for a, b in zip(ticks, ticks[1:])) * 1000
+
+
+if __name__ == "__main__":
+    from GestorObras import QApplication, QTimer, ImportWorker  # Qt só aqui: a suíte reutiliza xml_nfe sem janela
+    random.seed(20)
+    n_notas = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = os.path.join(tmp, "xmls"); esperado = gerar_pasta(pasta, n_notas)
+        db = Database(os.path.join(tmp, "bench.db")); db.criar_obra("Síncrono", "")
+
+        t0 = time.perf_counter(); r = db.importar_nfe(1, [pasta]); ms = (time.perf_counter() - t0) * 1000
+        print(f"{n_notas} notas: {r.importadas} importadas, {r.movimentacoes} entradas, {r.itens_criados} itens novos, "
+              f"{r.repetidas} repetidas, {r.total_erros} erros em {ms:.0f}ms")
+        assert r.importadas == n_notas and r.repetidas == 1 and r.total_erros == 2 and r.movimentacoes == esperado["movs"]
+        saidas = db.conn.execute("SELECT ROUND(SUM(valor), 2), COUNT(*) FROM financeiro WHERE obra_id=1 AND tipo='saida'").fetchone()
+        assert abs(saidas[0] - esperado["valor"]) < 0.01 and saidas[1] == n_notas, "financeiro divergente"
+        assert db.conn.execute(f"""SELECT COUNT(*) FROM estoque e WHERE obra_id=1 AND ABS(e.quantidade -
+                                   (SELECT SUM({db.MOV_SINAL}) FROM movimentacoes m WHERE m.item_id = e.id)) > 1e-6""").fetchone()[0] == 0
+        print("estoque e financeiro conferidos; erros:", r.erros)
+
+        # Memória: a nota de 990 itens lida sozinha (o resto da importação só acumula o lote)
+        grande = os.path.join(pasta, f"{chave(0)}-nfe.xml")
+        tracemalloc.start(); nota = ler_nfe(grande); pico = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+        print(f"nota de {len(nota.itens)} itens ({os.path.getsize(grande) / 2**10:.0f} KB): pico {pico / 2**10:.0f} KB")
+
+        t0 = time.perf_counter(); r2 = db.importar_nfe(1, [pasta])
+        print(f"reimportação: {r2.importadas} importadas, {r2.repetidas} puladas pela chave em {(time.perf_counter() - t0) * 1000:.0f}ms")
+        assert r2.importadas == 0 and r2.repetidas == n_notas + 1
+
+        # As chaves valem para o banco todo: a importação em thread usa um banco novo
+        db_thread = Database(os.path.join(tmp, "thread.db")); db_thread.criar_obra("Em thread", "")
+        res, ms, gap = importar_em_thread(app, db_thread, pasta)
+        print(f"em QThread: {res['r'].importadas} notas em {ms:.0f}ms; maior intervalo sem resposta da janela {gap:.0f}ms")
@@ -0,0 +1,54 @@
+# Benchmark: importar o núcleo (nucleo/) x o programa com janela (GestorObras.py), cada um num processo novo,
+# conferindo que o núcleo não carrega PySide6; depois gera folha, extrato, saldo e calculadoras sem Qt.
+# Uso: python benchmarks/bench_nucleo.py [repeticoes]   (padrão: 5)
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RAIZ)
+
+MEDIR = """
+import sys, time
+t0 = time.perf_counter(); import {modulo}; ms = (time.perf_counter() - t0) * 1000
+print(ms, any(m.split(".")[0] == "PySide6" for m in sys.modules))
+"""
+
+
+def importar(modulo, repeticoes):
+    # Com .pyc gravados (como numa instalação): a primeira rodada compila e é descartada
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    tempos = []; qt = None
+    for _ in range(repeticoes + 1):
+        saida = subprocess.run([sys.executable, "-c", MEDIR.format(modulo=modulo)], cwd=RAIZ, env=env,
+                               capture_output=True, text=True, check=True).stdout.split()
+        tempos.append(float(saida[0])); qt = saida[1] == "True"
+    return statistics.median(tempos[1:]), qt
+
+
+if __name__ == "__main__":
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    ms_nucleo, qt_nucleo = importar("nucleo", repeticoes)
+    ms_gui, qt_gui = importar("GestorObras", repeticoes)
+    print(f"import nucleo      : {ms_nucleo:6.1f}ms (PySide6 carregado: {qt_nucleo})")
+    print(f"import GestorObras : {ms_gui:6.1f}ms (PySide6 carregado: {qt_gui})")
+    assert not qt_nucleo, "o núcleo não pode depender do PySide6"
+
+    # Fluxo de fim de mês sem janela: folha, extrato e saldo de uma obra em memória
+    from nucleo import (Database, linha_folha, total_folha, linha_extrato, linha_saldo, em_metros, tijolos, concreto)
+    t0 = time.perf_counter()
+    db = Database(":memory:"); db.criar_obra("Bench", "")
+    for i in range(50): db.add_funcionario(1, f"Func {i:02d}", "Pedreiro", "2024-01-01", "", "", "", "", "", "", 150 + i)
+    db.salvar_presencas("2024-03-04", [(f, 1, f % 2) for f in range(1, 51)])
+    item = db.add_material(1, "Cimento", "Geral", "Saco"); db.movimentar_estoque(item, 10, "entrada", "2024-03-01", "", "", "")
+    db.add_financeiro(1, "2024-03-05", "saida", 1234.5, 2, "Areia", "123")
+    folha = db.relatorio_periodo(1, "2024-03-01", "2024-03-31")
+    assert len(folha) == 50 and abs(total_folha(folha) - sum(r[11] for r in folha)) < 1e-6
+    assert linha_folha(folha[0])[-1].startswith("R$ ") and linha_extrato(db.get_financeiro(1)[0])[2] == "R$ 1234.50"
+    assert linha_saldo(db.get_estoque(1)[0]) == ["Cimento", "Geral", "10.0 Saco"]
+    assert tijolos(em_metros("4", "m"), em_metros("280", "cm"), 0.19, 0.09) == int(4 * 2.8 / (0.19 * 0.09) * 1.1)
+    c = concreto(5, 4, em_metros("10", "cm"))
+    assert round(c.volume, 6) == 2 and round(c.sacos_cimento, 3) == round(2 * 1.52 / 6 * 1440 / 50, 3)
+    print(f"folha ({len(folha)} funcionários), extrato, saldo e calculadoras sem Qt em {(time.perf_counter() - t0) * 1000:.1f}ms")
@@ -0,0 +1,77 @@
+# Benchmark de partida: custo de importação (python -X importtime) e tempo do lançamento até o ProjectSelector na tela.
+# Falha (código 1) se passar do orçamento ou se algum import pesado voltar para o topo do módulo.
+# Uso: QT_QPA_PLATFORM=offscreen python benchmarks/bench_partida.py [limite_ms]   (padrão: 800ms)
+import ast
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ADIADOS = ("requests", "csv", "json", "subprocess", "webbrowser", "ctypes")  # só carregados quando usados
+REPETICOES = 5
+
+# Processo filho: roda o GestorObras.py como programa e avisa quando o seletor de obras aparece na tela
+FILHO = """
+import runpy, sys
+sys.path.insert(0, %r)  # como em "python GestorObras.py": a pasta do programa (e o pacote nucleo) no sys.path
+from PySide6.QtWidgets import QApplication, QDialog
+def exec_(self):
+    self.show(); QApplication.processEvents()
+    print("MOSTRADO", [m for m in %r if m in sys.modules], flush=True)
+    return QDialog.Rejected
+QDialog.exec = exec_
+runpy.run_path(%r, run_name="__main__")
+""" % (RAIZ, ADIADOS, os.path.join(RAIZ, "GestorObras.py"))
+
+
+def ambiente():
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def importtime():
+    saida = subprocess.run([sys.executable, "-X", "importtime", "-c", "import GestorObras"], cwd=RAIZ,
+                           env=ambiente(), capture_output=True, text=True).stderr
+    linhas = []
+    for linha in saida.splitlines():
+        if linha.startswith("import time:") and "|" in linha and "cumulative" not in linha:
+            _, acumulado, nome = linha.split("|")
+            linhas.append((int(acumulado), nome.strip()))
+    return linhas
+
+
+def lancar(pasta):
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", FILHO], cwd=pasta, env=ambiente(), stdout=subprocess.PIPE, text=True)
+    for linha in proc.stdout:
+        if linha.startswith("MOSTRADO"):
+            ms = (time.perf_counter() - t0) * 1000
+            proc.wait(); return ms, ast.literal_eval(linha[len("MOSTRADO"):].strip())
+    proc.wait(); raise RuntimeError("o seletor de obras não apareceu")
+
+
+if __name__ == "__main__":
+    limite = float(sys.argv[1]) if len(sys.argv) > 1 else 800.0
+    importtime()  # aquece o __pycache__
+    linhas = importtime()
+    total = next(us for us, nome in linhas if nome == "GestorObras")
+    print(f"import GestorObras: {total / 1000:.1f}ms; mais caros:")
+    for us, nome in sorted((l for l in linhas if l[1].count(".") <= 1 and l[1] != "GestorObras"), reverse=True)[:8]:
+        print(f"  {us / 1000:8.1f}ms  {nome}")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        tempos = []
+        for _ in range(REPETICOES):
+            ms, carregados = lancar(pasta); tempos.append(ms)
+    p50 = statistics.median(tempos)
+    print(f"lançamento → ProjectSelector na tela: p50 {p50:.0f}ms  max {max(tempos):.0f}ms  (limite {limite:.0f}ms)")
+
+    falhas = []
+    if carregados: falhas.append(f"imports que deveriam ser adiados foram carregados na partida: {carregados}")
+    if p50 > limite: falhas.append(f"partida acima do limite: {p50:.0f}ms > {limite:.0f}ms")
+    for f in falhas: print("FALHA:", f)
+    sys.exit(1 if falhas else 0)
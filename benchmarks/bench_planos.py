@@ -0,0 +1,77 @@
+# Verificação dos planos (EXPLAIN QUERY PLAN) das consultas quentes do Database: cada uma tem que usar o índice
+# esperado, nunca varrer (SCAN) as tabelas grandes e só ordenar em B-tree temporária onde isso foi aceito. Captura o SQL que o próprio método executa (trace callback),
+# então vale para o código como está. Roda sem estatísticas (o app não roda ANALYZE: é o caso dos bancos dos
+# clientes) e depois do ANALYZE.
+# Uso: python benchmarks/bench_planos.py [escala]   (padrão: pequeno; sai com 1 se algum plano regredir)
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database
+from dados_sinteticos import gerar
+
+HOJE = "2025-12-01"
+
+# nome: (chamada, índice esperado, tabelas/apelidos grandes que não podem ser varridos, ORDER BY em B-tree temporária)
+# O histórico ordena: movimentacoes não tem obra_id, então nenhum índice entrega as linhas da obra já em (data DESC,
+# id DESC). Todas as movimentações da obra são lidas pelo índice (item a item) e o sorter guarda só as LIMIT primeiras.
+CASOS = {
+    "get_historico (obra)": (lambda db: db.get_historico(1, limite=200), "idx_movimentacoes_item_data_filtros", ("m", "movimentacoes"), True),
+    "get_historico (obra + item)": (lambda db: db.get_historico(1, "Cimento", limite=200), "idx_movimentacoes_item_data_filtros", ("m", "movimentacoes"), True),
+    "get_historico (obra + filtros)": (lambda db: db.get_historico(1, "", "Bloco", "Entrada", "Hidráulica", limite=200),
+                                       "idx_movimentacoes_item_data_filtros", ("m", "movimentacoes"), True),
+    "get_dashboard_stats": (lambda db: db.get_dashboard_stats(1, HOJE), "idx_presenca_data", ("p", "presenca", "f", "funcionarios"), False),
+    "get_presenca_dia": (lambda db: db.get_presenca_dia(1, HOJE), "idx_presenca_data", ("p", "presenca"), False),
+    "get_portfolio": (lambda db: db.get_portfolio(HOJE), "idx_presenca_data", ("p", "presenca"), False),
+    "get_financeiro": (lambda db: db.get_financeiro(1), "idx_financeiro_obra_data", ("financeiro",), False),
+    "get_funcionarios": (lambda db: db.get_funcionarios(1), "idx_funcionarios_obra_ativo_nome", ("funcionarios",), False),
+    "get_epi_historico": (lambda db: db.get_epi_historico(1), "idx_epi_obra_data", ("e", "epi"), False),
+    # ordena só a folha (uma linha por funcionário) por nome
+    "relatorio_periodo": (lambda db: db.relatorio_periodo(1, "2025-09-20", "2025-11-10"), "sqlite_autoindex_presenca_1",
+                          ("p", "presenca", "m", "presenca_mensal"), True),
+}
+
+
+def planos(db, chamada):
+    # (sql, [detalhes do plano]) de cada SELECT que a chamada executou
+    executados = []
+    db.read_conn.set_trace_callback(executados.append)
+    try: chamada(db)
+    finally: db.read_conn.set_trace_callback(None)
+    return [(sql, [r[3] for r in db.read_conn.execute("EXPLAIN QUERY PLAN " + sql)])
+            for sql in executados if sql.lstrip().upper().startswith(("SELECT", "WITH"))]
+
+
+def conferir(db):
+    falhas = []
+    for nome, (chamada, indice, grandes, ordena) in CASOS.items():
+        detalhes = [d for _, plano in planos(db, chamada) for d in plano]
+        varreduras = [d for d in detalhes if re.match(rf"SCAN ({'|'.join(grandes)})\b", d)]
+        usa = any(re.search(rf"USING (COVERING )?INDEX {indice}\b", d) for d in detalhes)
+        ordenou = "USE TEMP B-TREE FOR ORDER BY" in detalhes
+        print(f"  {'ok   ' if usa and not varreduras and ordenou == ordena else 'FALHA'} {nome:<32} {' | '.join(detalhes)}")
+        if not usa: falhas.append(f"{nome}: não usa {indice}")
+        if varreduras: falhas.append(f"{nome}: {varreduras}")
+        if ordenou != ordena: falhas.append(f"{nome}: {'passou a' if ordenou else 'deixou de'} ordenar em B-tree temporária")
+    return falhas
+
+
+if __name__ == "__main__":
+    escala = sys.argv[1] if len(sys.argv) > 1 else "pequeno"
+    cache = os.path.join(tempfile.gettempdir(), f"gestor_sintetico_{escala}_42.db")
+    if not os.path.exists(cache):
+        print(f"gerando banco sintético '{escala}' em {cache}")
+        db = Database(cache); gerar(db, escala, 42); db.close()
+    falhas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "planos.db"); shutil.copy(cache, path)
+        db = Database(path); db.conn.execute("DROP TABLE IF EXISTS sqlite_stat1"); db.close()
+        for etapa in ("sem estatísticas", "depois do ANALYZE"):
+            db = Database(path)  # conexão nova: o planejador relê (ou não) as estatísticas
+            print(etapa); falhas += [f"{etapa}: {f}" for f in conferir(db)]
+            db.conn.execute("ANALYZE"); db.close()
+    for f in falhas: print("FALHA:", f)
+    sys.exit(1 if falhas else 0)
@@ -0,0 +1,61 @@
+# Benchmark: painel geral das obras -> N x get_dashboard_stats (uma obra por vez) x get_portfolio (consultas agrupadas)
+# Uso: python benchmarks/bench_portfolio.py [obras] [funcionarios_por_obra] [dias]   (padrão: 120 x 30 x 365)
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database
+
+
+def popular(db, n_obras, n_func, n_dias):
+    with db.transacao() as c:
+        c.executemany("INSERT INTO obras (nome, endereco, data_inicio) VALUES (?, 'Rua X', '2024-01-01')",
+                      ((f"Obra {o:03d}",) for o in range(n_obras)))
+        c.executemany("INSERT INTO funcionarios (obra_id, nome, funcao, ativo) VALUES (?, ?, 'Pedreiro', 1)",
+                      ((o + 1, f"Func {o}-{i}") for o in range(n_obras) for i in range(n_func)))
+        c.executemany("INSERT INTO presenca (func_id, data, manha, tarde) VALUES (?, date('2024-01-01', ?), ?, ?)",
+                      ((f + 1, f"+{d} days", random.randint(0, 1), random.randint(0, 1))
+                       for d in range(n_dias) for f in range(n_obras * n_func)))
+        c.executemany("INSERT INTO estoque (obra_id, item, unidade, quantidade) VALUES (?, ?, 'Un', ?)",
+                      ((o + 1, f"Item {i}", random.randint(0, 20)) for o in range(n_obras) for i in range(200)))
+        c.executemany("INSERT INTO financeiro (obra_id, data, tipo, valor) VALUES (?, '2024-03-01', ?, ?)",
+                      ((o + 1, random.choice(["entrada", "saida"]), random.randint(1, 500)) for o in range(n_obras) for _ in range(500)))
+        c.executemany("INSERT INTO diario (obra_id, data, clima, atividades, ocorrencias) VALUES (?, date('2024-01-01', ?), 'Sol', '', '')",
+                      ((o + 1, f"+{d} days") for o in range(n_obras) for d in range(random.randint(0, n_dias))))
+    c.execute("ANALYZE")
+
+
+def uma_por_vez(db, data):
+    linhas = []
+    for obra_id, nome, endereco, _ in db.get_obras():
+        stats = db.get_dashboard_stats(obra_id, data)
+        ultimo = db.read_conn.execute("SELECT MAX(data) FROM diario WHERE obra_id=?", (obra_id,)).fetchone()[0]
+        linhas.append((obra_id, nome, endereco, stats.saldo, stats.presentes_count, len(stats.baixo_estoque), ultimo))
+    return linhas
+
+
+def medir(func, repeticoes=10):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter(); func(); tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tempos)
+
+
+if __name__ == "__main__":
+    random.seed(5)
+    n_obras = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    n_func = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    n_dias = int(sys.argv[3]) if len(sys.argv) > 3 else 365
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        t0 = time.perf_counter(); popular(db, n_obras, n_func, n_dias)
+        print(f"{n_obras} obras, {n_obras * n_func * n_dias} presenças (carga em {time.perf_counter() - t0:.1f}s)")
+        data = "2024-06-15"
+        assert [tuple(o) for o in db.get_portfolio(data)] == uma_por_vez(db, data), "resultados divergentes"
+        print(f"N x get_dashboard_stats : {medir(lambda: uma_por_vez(db, data)):8.1f}ms")
+        print(f"get_portfolio           : {medir(lambda: db.get_portfolio(data)):8.1f}ms")
+        print(f"sem mudanças (versão)   : {medir(db.versao_dados) * 1000:8.1f}µs")
@@ -0,0 +1,90 @@
+# Benchmark/verificação da checagem de atualização contra um servidor HTTP local que imita a API do GitHub.
+# Modos do servidor: normal (200 + ETag, 304 se o ETag bater), lento (atraso de 3s), falha (500).
+# Uso: QT_QPA_PLATFORM=offscreen python benchmarks/bench_update_check.py   (sai com 1 se algum caso divergir)
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import GestorObras
+from GestorObras import QApplication, QSettings, Database, AutoUpdater, ConstructionApp
+
+RELEASE = {"tag_name": "v9.9.9", "body": "Notas", "assets": [
+    {"name": "GestorObras.exe", "browser_download_url": "http://127.0.0.1/GestorObras.exe"},
+    {"name": "GestorObras-linux", "browser_download_url": "http://127.0.0.1/GestorObras-linux"}]}
+ETAG = '"v9.9.9"'
+
+
+class StandIn(BaseHTTPRequestHandler):
+    modo = "normal"
+    pedidos = []
+
+    def do_GET(self):
+        StandIn.pedidos.append((StandIn.modo, self.headers.get("If-None-Match")))
+        if StandIn.modo == "lento": time.sleep(3)
+        if StandIn.modo == "falha":
+            self.send_response(500); self.end_headers(); return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304); self.end_headers(); return
+        corpo = json.dumps(RELEASE).encode()
+        self.send_response(200); self.send_header("ETag", ETAG); self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers(); self.wfile.write(corpo)
+
+    def log_message(self, *args): pass
+
+
+def checar(url, cache, intervalo_h=0, forcar=False):
+    up = AutoUpdater(api_url=url, cache_path=cache, intervalo_h=intervalo_h)
+    t0 = time.perf_counter(); achou = up.check_updates(forcar)
+    return achou, up.ultima_fonte, (time.perf_counter() - t0) * 1000
+
+
+if __name__ == "__main__":
+    app = QApplication.instance() or QApplication(sys.argv)
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_port}/releases/latest"
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, "update_cache.json")
+        falhas = []
+        # nome, modo do servidor, argumentos, esperado: (achou, fonte, pedidos, ETag enviado no pedido)
+        casos = [("primeira consulta", "normal", {}, (True, "rede", 1, None)),
+                 ("ETag igual (304)", "normal", {}, (True, "304", 1, ETAG)),
+                 ("dentro do intervalo", "normal", {"intervalo_h": 6}, (True, "cache", 0, None)),
+                 ("servidor com erro", "falha", {}, (True, "falha", 1, ETAG)),  # usa a release do cache
+                 ("servidor lento", "lento", {}, (True, "304", 1, ETAG))]
+        for nome, modo, kw, esperado in casos:
+            StandIn.modo = modo; antes = len(StandIn.pedidos)
+            achou, fonte, ms = checar(url, cache, **kw)
+            pedidos = StandIn.pedidos[antes:]
+            print(f"{nome:<22} achou={achou!s:<5} fonte={fonte:<6} pedidos={len(pedidos)} {ms:8.1f}ms")
+            obtido = (achou, fonte, len(pedidos), pedidos[-1][1] if pedidos else None)
+            if obtido != esperado: falhas.append(f"{nome}: (achou, fonte, pedidos, ETag) = {obtido}, esperado {esperado}")
+        os.remove(cache)
+        achou, fonte, _ = checar("http://127.0.0.1:9/", cache)
+        print(f"{'offline sem cache':<22} achou={achou!s:<5} fonte={fonte}")
+        if (achou, fonte) != (False, "falha"): falhas.append(f"offline sem cache: achou={achou} fonte={fonte}")
+
+        # Abertura da janela com a API lenta (3s): a primeira pintura não pode esperar a resposta
+        StandIn.modo = "lento"
+        GestorObras.UPDATE_API_URL, GestorObras.UPDATE_CACHE = url, cache
+        QSettings("MiizaSoft", "GestorObras").setValue("update_interval_h", 0)
+        GestorObras.AutoUpdater.start_update = lambda self: print(f"  release {self.new_version} entregue ao thread da GUI")
+        db = Database(os.path.join(tmp, "bench.db")); db.criar_obra("Bench", "")
+        janela = ConstructionApp(db, (1, "Bench")); janela.show()
+        while janela.primeira_pintura_ms is None: app.processEvents()
+        pendente = not janela.updater.new_version
+        print(f"{'janela (API lenta)':<22} primeira pintura em {janela.primeira_pintura_ms:.0f}ms (resposta da API ainda pendente: {pendente})")
+        if not pendente or janela.primeira_pintura_ms >= 3000: falhas.append("a primeira pintura esperou a API de atualização")
+        fim = time.time() + 5
+        while time.time() < fim and not janela.updater.new_version: app.processEvents()
+        if janela.updater.new_version != "9.9.9": falhas.append(f"release não entregue à janela ({janela.updater.new_version!r})")
+        db.close()
+        QSettings("MiizaSoft", "GestorObras").remove("update_interval_h")
+    servidor.shutdown()
+    for f in falhas: print("FALHA:", f)
+    sys.exit(1 if falhas else 0)
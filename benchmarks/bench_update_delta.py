@@ -0,0 +1,90 @@
+# Benchmark/verificação da atualização por delta (bsdiff) contra um servidor de releases local.
+# Cenários: patch aplicado, patch corrompido, executável local diferente, release sem patch e bsdiff4 ausente
+# (os quatro últimos devem cair no download completo). Uso: QT_QPA_PLATFORM=offscreen python benchmarks/bench_update_delta.py [MB]
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import bsdiff4
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import GestorObras
+from GestorObras import QApplication, AutoUpdater, UpdateWorker
+
+
+class Releases(BaseHTTPRequestHandler):
+    arquivos = {}
+    enviados = 0
+
+    def do_GET(self):
+        if self.path == "/releases/latest":
+            base = f"http://127.0.0.1:{self.server.server_port}"
+            assets = [{"name": n, "browser_download_url": f"{base}/{n}"} for n in self.arquivos]
+            corpo = json.dumps({"tag_name": "v9.9.9", "body": "", "assets": assets}).encode()
+        elif self.path.lstrip("/") in self.arquivos:
+            corpo = self.arquivos[self.path.lstrip("/")]; Releases.enviados += len(corpo)
+        else:
+            self.send_response(404); self.send_header("Content-Length", "0"); self.end_headers(); return
+        self.send_response(200); self.send_header("Content-Length", str(len(corpo))); self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args): pass
+
+
+def executavel(tamanho, semente):
+    rnd = random.Random(semente)
+    return bytes(rnd.getrandbits(8) for _ in range(tamanho))
+
+
+def atualizar(app, url_api, base, destino):
+    up = AutoUpdater(api_url=url_api, cache_path=os.path.join(os.path.dirname(destino), "cache.json"), intervalo_h=0)
+    up.is_windows = True
+    assert up.check_updates(forcar=True)
+    w = UpdateWorker(up.download_url, destino, up.sha256, up.sha256_url, up.delta_url, base=base); res = {}
+    w.concluido.connect(lambda: res.setdefault("ok", True)); w.error.connect(lambda m: res.setdefault("erro", m))
+    Releases.enviados = 0; t0 = time.perf_counter(); w.start()
+    while not res: app.processEvents(); time.sleep(0.005)
+    w.wait()
+    return res, w.modo, Releases.enviados, (time.perf_counter() - t0) * 1000
+
+
+if __name__ == "__main__":
+    mb = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    app = QApplication.instance() or QApplication(sys.argv)
+    antigo = executavel(mb * 1024 * 1024, 1)
+    novo = bytearray(antigo)  # nova versão: poucas regiões alteradas, como numa release típica
+    for pos in range(0, len(novo), len(novo) // 20): novo[pos:pos + 300] = os.urandom(300)
+    novo = bytes(novo)
+    sha_novo = hashlib.sha256(novo).hexdigest()
+    nome = "gestorobras.exe"
+    patch = bsdiff4.diff(antigo, novo)
+    delta = f"{nome}.from-{GestorObras.APP_VERSION}.bsdiff"
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Releases)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url_api = f"http://127.0.0.1:{servidor.server_port}/releases/latest"
+    print(f"executável {len(novo) / 2**20:.1f} MB, patch {len(patch) / 2**10:.0f} KB")
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "instalado.exe")
+        cenarios = [("patch aplicado", {delta: patch}, antigo, False),
+                    ("patch corrompido", {delta: patch[:-50] + b"x" * 50}, antigo, False),
+                    ("executável local diferente", {delta: patch}, antigo[::-1], False),
+                    ("release sem patch", {}, antigo, False),
+                    ("bsdiff4 ausente", {delta: patch}, antigo, True)]
+        for titulo, extra, instalado, sem_bsdiff in cenarios:
+            Releases.arquivos = {nome: novo, nome + ".sha256": f"{sha_novo}  {nome}\n".encode(), **extra}
+            with open(base, "wb") as f: f.write(instalado)
+            if sem_bsdiff: sys.modules["bsdiff4"] = None
+            destino = os.path.join(tmp, "update_temp.exe")
+            if os.path.exists(destino): os.remove(destino)
+            res, modo, enviados, ms = atualizar(app, url_api, base, destino)
+            sys.modules["bsdiff4"] = bsdiff4
+            ok = res.get("ok") and hashlib.sha256(open(destino, "rb").read()).hexdigest() == sha_novo
+            print(f"{titulo:<28} modo={modo:<9} baixado {enviados / 2**20:6.2f} MB {ms:7.0f}ms  {'OK' if ok else 'ERRO ' + res.get('erro', '')}")
+    servidor.shutdown()
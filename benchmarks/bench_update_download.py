@@ -0,0 +1,118 @@
+# Benchmark/verificação do UpdateWorker contra um servidor HTTP local (suporta Range).
+# Cenários: download normal, conexão que cai no meio (retomada por Range), servidor que ignora Range,
+# arquivo corrompido (SHA-256 não confere) e checksum publicado como asset ".sha256".
+# Uso: QT_QPA_PLATFORM=offscreen python benchmarks/bench_update_download.py [MB]   (sai com 1 se algum cenário divergir)
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GestorObras import QApplication, UpdateWorker
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    blob = b""
+    modo = "normal"
+    enviados = 0  # bytes do executável efetivamente transmitidos
+
+    def do_GET(self):
+        if self.path.endswith(".sha256"):
+            corpo = f"{hashlib.sha256(self.blob).hexdigest()}  GestorObras.exe\n".encode()
+            self.send_response(200); self.send_header("Content-Length", str(len(corpo))); self.end_headers()
+            self.wfile.write(corpo); return
+        dados = self.blob if StandIn.modo != "corrompido" else self.blob[:-1] + b"X"
+        inicio = 0
+        rng = self.headers.get("Range")
+        if rng and StandIn.modo != "sem_range":
+            inicio = int(rng.split("=")[1].rstrip("-"))
+            if inicio >= len(dados):
+                self.send_response(416); self.send_header("Content-Length", "0"); self.end_headers(); return
+            self.send_response(206); self.send_header("Content-Range", f"bytes {inicio}-{len(dados) - 1}/{len(dados)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(dados) - inicio)); self.end_headers()
+        corte = len(dados) if StandIn.modo != "cair" else len(dados) // 2
+        if StandIn.modo == "cair": StandIn.modo = "normal"  # só a primeira conexão cai
+        pos = inicio
+        while pos < min(corte, len(dados)):
+            bloco = dados[pos:min(pos + 65536, corte)]
+            self.wfile.write(bloco); pos += len(bloco); StandIn.enviados += len(bloco)
+        if corte < len(dados): self.close_connection = True
+
+    def log_message(self, *args): pass
+
+
+def baixar(app, url, destino, **kw):
+    worker = UpdateWorker(url, destino, **kw); res = {}
+    worker.concluido.connect(lambda: res.setdefault("ok", True))
+    worker.error.connect(lambda m: res.setdefault("erro", m))
+    t0 = time.perf_counter(); worker.start()
+    while not res: app.processEvents(); time.sleep(0.005)
+    worker.wait()
+    return res, worker, (time.perf_counter() - t0) * 1000
+
+
+def antigo(url, destino):
+    # Comportamento anterior: blocos de 1 KiB e um sinal de progresso por bloco, sem verificação
+    import requests
+    sinais = 0
+    t0 = time.perf_counter()
+    resp = requests.get(url, stream=True); wrote = 0
+    with open(destino, "wb") as f:
+        for data in resp.iter_content(1024):
+            wrote += len(data); f.write(data); sinais += 1
+    return sinais, (time.perf_counter() - t0) * 1000
+
+
+if __name__ == "__main__":
+    mb = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    app = QApplication.instance() or QApplication(sys.argv)
+    StandIn.blob = os.urandom(mb * 1024 * 1024)
+    sha = hashlib.sha256(StandIn.blob).hexdigest()
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_port}/GestorObras.exe"
+    UpdateWorker.TENTATIVAS = 3
+    with tempfile.TemporaryDirectory() as tmp:
+        destino = os.path.join(tmp, "update_temp.exe")
+        sinais, ms = antigo(url, destino)
+        print(f"{'antigo (1 KiB)':<20} {ms:8.0f}ms  sinais de progresso: {sinais}")
+        parcial = f"{destino}.{sha[:12]}.part"
+        falhas = []
+        # nome, modo do servidor, argumentos, .part de uma execução anterior, erro esperado (None = sucesso),
+        # fração do arquivo transferida (mín, máx) e retomadas mínimas
+        for nome, modo, kw, meio, erro, faixa, retomadas in (
+                ("normal", "normal", {"sha256": sha}, False, None, (1.0, 1.0), 0),
+                ("conexão cai", "cair", {"sha256": sha}, False, None, (1.0, 1.25), 1),  # retoma, não recomeça (1,5x)
+                ("retoma .part", "normal", {"sha256": sha}, True, None, (0.5, 0.5), 0),
+                ("ignora Range", "sem_range", {"sha256": sha}, True, None, (1.0, 1.0), 0),
+                ("asset .sha256", "normal", {"sha256_url": url + ".sha256"}, False, None, (1.0, 1.0), 0),
+                ("corrompido", "corrompido", {"sha256": sha}, False, "SHA-256 não confere", (1.0, 1.0), 0),
+                ("sem checksum", "normal", {}, False, "não tem checksum", (0.0, 0.0), 0)):
+            StandIn.modo = modo; StandIn.enviados = 0
+            if os.path.exists(destino): os.remove(destino)
+            if meio:  # sobra de um download interrompido numa execução anterior
+                with open(parcial, "wb") as f: f.write(StandIn.blob[:len(StandIn.blob) // 2])
+            res, w, ms = baixar(app, url, destino, **kw)
+            transferido = StandIn.enviados / len(StandIn.blob)
+            print(f"{nome:<20} {ms:8.0f}ms  sinais: {w.sinais:3d}  retomadas: {w.retomadas}  "
+                  f"transferido: {transferido:5.2f}x  {'OK' if res.get('ok') else 'ERRO: ' + res['erro']}")
+            if erro is None:
+                if not res.get("ok"): falhas.append(f"{nome}: falhou ({res.get('erro')})")
+                elif os.path.getsize(destino) != len(StandIn.blob): falhas.append(f"{nome}: {os.path.getsize(destino)} bytes, esperados {len(StandIn.blob)}")
+                elif hashlib.sha256(open(destino, "rb").read()).hexdigest() != sha: falhas.append(f"{nome}: hash divergente")
+            elif erro not in res.get("erro", ""): falhas.append(f"{nome}: esperado erro '{erro}', veio {res}")
+            elif os.path.exists(destino): falhas.append(f"{nome}: arquivo rejeitado ficou em {destino}")
+            if not faixa[0] - 0.01 <= transferido <= faixa[1] + 0.01: falhas.append(f"{nome}: transferido {transferido:.2f}x, esperado {faixa}")
+            if w.retomadas < retomadas: falhas.append(f"{nome}: {w.retomadas} retomadas, esperadas ao menos {retomadas}")
+        restantes = [f for f in os.listdir(tmp) if f.endswith(".part")]
+        print("arquivos .part restantes:", restantes)
+        if restantes: falhas.append(f".part não removidos: {restantes}")
+    servidor.shutdown()
+    for f in falhas: print("FALHA:", f)
+    sys.exit(1 if falhas else 0)
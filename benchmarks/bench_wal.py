@@ -0,0 +1,53 @@
+# Benchmark: perfil padrão (rollback journal) x perfil de desempenho (WAL + conexão de leitura)
+# Uso: python benchmarks/bench_wal.py [escritas]
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database
+
+
+def medir_escritas(path, desempenho, n):
+    db = Database(path, desempenho=desempenho)
+    db.criar_obra("Bench", "Rua X")
+    inicio = time.perf_counter()
+    for i in range(n):
+        db.add_financeiro(1, f"2025-01-{i % 28 + 1:02d}", "saida", 10.0, 1.0, f"Lançamento {i}", "")
+    return n / (time.perf_counter() - inicio)
+
+
+def medir_leituras(path, desempenho, duracao=2.0):
+    # Um escritor em outra thread (com sua própria conexão) grava sem parar enquanto medimos as leituras
+    parar = threading.Event()
+
+    def escritor():
+        db_w = Database(path, desempenho=desempenho)
+        while not parar.is_set():
+            db_w.add_financeiro(1, "2025-02-01", "entrada", 5.0, 1.0, "Escritor", "")
+
+    t = threading.Thread(target=escritor); t.start()
+    db = Database(path, desempenho=desempenho)
+    latencias = []
+    fim = time.perf_counter() + duracao
+    while time.perf_counter() < fim:
+        t0 = time.perf_counter()
+        db.get_dashboard_stats(1, "2025-01-01")
+        latencias.append((time.perf_counter() - t0) * 1000)
+    parar.set(); t.join()
+    latencias.sort()
+    return statistics.median(latencias), latencias[int(len(latencias) * 0.95)], latencias[-1]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"{'Perfil':<12} {'escritas/s':>12} {'leitura p50':>12} {'p95':>9} {'max':>9}")
+    for nome, desempenho in (("padrão", False), ("desempenho", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            escritas = medir_escritas(path, desempenho, n)
+            p50, p95, pmax = medir_leituras(path, desempenho)
+            print(f"{nome:<12} {escritas:>12.0f} {p50:>10.2f}ms {p95:>7.2f}ms {pmax:>7.2f}ms")
@@ -0,0 +1,110 @@
+# Gerador de dados sintéticos (determinístico pela semente) para medir o Database em escala:
+# obras, funcionários (com inativos e histórico), anos de presença, itens e movimentações de estoque,
+# financeiro, diário com texto e EPIs. Grava pelos mesmos triggers que o app usa (resumos, busca, checkpoints).
+# Uso: python benchmarks/dados_sinteticos.py saida.db [--escala pequeno|medio|grande] [--semente 42]
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nucleo import Database
+
+FIM = date(2025, 12, 31)  # fixo: o mesmo banco em qualquer dia em que for gerado
+
+ESCALAS = {
+    "pequeno": dict(obras=3, funcionarios=50, anos=1, itens=100, movimentacoes=50_000, financeiro=20_000),
+    "medio": dict(obras=10, funcionarios=200, anos=2, itens=300, movimentacoes=1_000_000, financeiro=300_000),
+    "grande": dict(obras=20, funcionarios=500, anos=5, itens=500, movimentacoes=5_000_000, financeiro=2_000_000),
+}
+
+FUNCOES = ["Pedreiro", "Servente", "Ajudante", "Eletricista", "Encanador", "Pintor", "Carpinteiro", "Mestre de Obras"]
+CATEGORIAS = ["Geral", "Hidráulica", "Elétrica", "Pintura", "Alvenaria", "Acabamento", "Ferramentas"]
+MATERIAIS = ["Cimento", "Areia", "Brita", "Tijolo", "Bloco", "Vergalhão", "Tubo PVC", "Joelho", "Fio", "Disjuntor",
+             "Tinta", "Massa corrida", "Piso", "Argamassa", "Prego", "Parafuso", "Luva", "Capacete", "Cal", "Telha"]
+UNIDADES = ["Unidade", "Saco", "m³", "Metro", "Kg", "Barra", "Lata", "Caixa"]
+ORIGENS = ["Depósito Central", "Casa do Construtor", "Madeireira Silva", "Elétrica Luz", "Hidro Tubos", "Obra vizinha"]
+DESTINOS = ["Bloco A", "Bloco B", "Térreo", "1º Pavimento", "2º Pavimento", "Cobertura", "Área externa"]
+PALAVRAS = ("concretagem laje pilar viga fôrma armação alvenaria reboco chapisco contrapiso impermeabilização "
+            "instalação elétrica hidráulica esgoto pintura acabamento revestimento cerâmica telhado calha "
+            "chuva atraso entrega material equipe vistoria fiscalização medição escavação fundação estaca").split()
+CLIMAS = ["Ensolarado", "Nublado", "Chuvoso", "Garoa", "Tempestade"]
+
+
+def dias(anos):
+    inicio = FIM - timedelta(days=365 * anos - 1)
+    return [(inicio + timedelta(days=d)).isoformat() for d in range(365 * anos)]
+
+
+def texto(rnd, n):
+    return " ".join(rnd.choice(PALAVRAS) for _ in range(n)).capitalize() + "."
+
+
+def gerar(db, escala="medio", semente=42, log=print):
+    p = ESCALAS[escala]; rnd = random.Random(semente); calendario = dias(p["anos"]); t0 = time.perf_counter()
+    n_func = p["obras"] * p["funcionarios"]; n_itens = p["obras"] * p["itens"]
+
+    def etapa(nome):
+        log(f"  {nome:<14} {time.perf_counter() - t0:6.1f}s")
+
+    with db.transacao() as c:
+        c.executemany("INSERT INTO obras (nome, endereco, data_inicio) VALUES (?, ?, ?)",
+                      ((f"Obra {o:02d}", f"Rua {rnd.choice(PALAVRAS).title()}, {rnd.randint(1, 999)}", calendario[0]) for o in range(p["obras"])))
+        c.executemany("""INSERT INTO funcionarios (obra_id, nome, funcao, data_admissao, telefone, cpf, rg, banco, agencia, conta, valor_diaria, ativo)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, 'Banco', '0001', ?, ?, ?)""",
+                      ((f // p["funcionarios"] + 1, f"Funcionário {f:05d}", rnd.choice(FUNCOES), rnd.choice(calendario[:60]),
+                        f"(11) 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}", f"{rnd.randint(0, 99999999999):011d}",
+                        f"{rnd.randint(0, 999999999):09d}", f"{rnd.randint(0, 99999)}-{rnd.randint(0, 9)}",
+                        rnd.choice([120.0, 150.0, 180.0, 220.0]), 0 if rnd.random() < 0.1 else 1) for f in range(n_func)))
+        c.execute("""INSERT INTO historico_status (func_id, data, novo_status, motivo)
+                     SELECT id, data_admissao, 0, 'Fim de contrato' FROM funcionarios WHERE ativo = 0""")
+    etapa("funcionários")
+
+    with db.transacao() as c:
+        ativos = [r[0] for r in c.execute("SELECT id FROM funcionarios WHERE ativo = 1")]
+        c.executemany("INSERT INTO presenca (func_id, data, manha, tarde) VALUES (?, ?, ?, ?)",
+                      ((f, d, int(r < 0.9), int(r < 0.8)) for d in calendario for f in ativos if (r := rnd.random()) < 0.9))
+    etapa("presença")
+
+    with db.transacao() as c:
+        c.executemany("INSERT INTO estoque (obra_id, item, categoria, unidade, quantidade, alerta_qtd, alerta_on) VALUES (?, ?, ?, ?, 0, ?, 1)",
+                      ((i // p["itens"] + 1, f"{rnd.choice(MATERIAIS)} {i % p['itens']:03d}", rnd.choice(CATEGORIAS), rnd.choice(UNIDADES),
+                        rnd.choice([5.0, 10.0, 20.0])) for i in range(n_itens)))
+        c.executemany("INSERT INTO movimentacoes (item_id, data, tipo, quantidade, origem, destino, nota_fiscal) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                      ((rnd.randint(1, n_itens), rnd.choice(calendario), tipo := rnd.choices(["entrada", "saida", "uso_interno"], [5, 3, 2])[0],
+                        rnd.randint(1, 50), rnd.choice(ORIGENS) if tipo == "entrada" else "", rnd.choice(DESTINOS) if tipo != "entrada" else "",
+                        f"{rnd.randint(1000, 999999)}" if tipo == "entrada" and rnd.random() < 0.3 else "") for _ in range(p["movimentacoes"])))
+        c.execute(f"""UPDATE estoque SET quantidade = (SELECT COALESCE(SUM({db.MOV_SINAL}), 0) FROM movimentacoes m WHERE m.item_id = estoque.id)""")
+    etapa("estoque")
+
+    with db.transacao() as c:
+        c.executemany("INSERT INTO financeiro (obra_id, data, tipo, valor, quantidade, descricao, nota_fiscal) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                      ((rnd.randint(1, p["obras"]), rnd.choice(calendario), tipo := rnd.choices(["saida", "entrada"], [9, 1])[0],
+                        round(rnd.uniform(5, 5000) * (20 if tipo == "entrada" else 1), 2), rnd.randint(1, 10),
+                        f"{rnd.choice(MATERIAIS)} - {rnd.choice(ORIGENS)}", f"{rnd.randint(1000, 999999)}" if rnd.random() < 0.5 else "")
+                       for _ in range(p["financeiro"])))
+    etapa("financeiro")
+
+    with db.transacao() as c:
+        c.executemany("INSERT INTO diario (obra_id, data, clima, atividades, ocorrencias) VALUES (?, ?, ?, ?, ?)",
+                      ((o, d, rnd.choice(CLIMAS), texto(rnd, rnd.randint(8, 40)), texto(rnd, rnd.randint(0, 15)) if rnd.random() < 0.3 else "")
+                       for o in range(1, p["obras"] + 1) for d in calendario if rnd.random() < 0.85))
+        c.executemany("INSERT INTO epi (obra_id, func_id, data, item) VALUES ((SELECT obra_id FROM funcionarios WHERE id = ?), ?, ?, ?)",
+                      ((f, f, rnd.choice(calendario), rnd.choice(["Capacete", "Luva", "Bota", "Óculos", "Protetor auricular"]))
+                       for f in ativos for _ in range(rnd.randint(1, 4))))
+    etapa("diário/EPI")
+    db.conn.execute("ANALYZE")
+    return p
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Gera um banco sintético do Gestor de Obras")
+    ap.add_argument("saida")
+    ap.add_argument("--escala", choices=ESCALAS, default="medio")
+    ap.add_argument("--semente", type=int, default=42)
+    args = ap.parse_args()
+    if os.path.exists(args.saida): sys.exit(f"{args.saida} já existe")
+    print(f"gerando escala '{args.escala}' (semente {args.semente}) em {args.saida}")
+    db = Database(args.saida); gerar(db, args.escala, args.semente); db.close()
@@ -0,0 +1,227 @@
+# Suíte de desempenho do Database sobre o banco sintético (dados_sinteticos.py): mede cada método público
+# (leituras com todas as combinações de filtro do histórico, gravações, importações) e compara com a linha de base
+# gravada. Leituras também guardam um hash do resultado: mudar o que uma consulta devolve também é falha.
+# Uso: python benchmarks/suite.py [--escala medio] [--gravar] [--filtro historico] [--banco dados.db]
+#   --gravar   grava/atualiza benchmarks/baseline_<escala>.json (os tempos valem para a máquina onde foram medidos)
+#   sem --gravar: sai com código 1 se algum caso (menor tempo das repetições, remedido antes de acusar) ficar mais
+#   lento que base x tolerância e base + folga, ou mudar o resultado
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(AQUI, ".."))
+from nucleo import Database
+from dados_sinteticos import ESCALAS, FIM, gerar
+from bench_importacao import gerar_csv
+from bench_nfe import xml_nfe, PRODUTOS
+
+HOJE = FIM.isoformat()
+TIPOS = ["Todos", "Entrada", "Saída", "Uso Interno"]
+PAGINA = 200  # HistoricoModel.PAGINA: tamanho da página do histórico na tela
+
+
+class Caso:
+    # preparar(db) roda fora da medição e devolve os argumentos de medir; conferir=False para resultados que mudam a cada chamada
+    def __init__(self, nome, medir, preparar=None, conferir=True):
+        self.nome = nome; self.medir = medir; self.preparar = preparar; self.conferir = conferir
+
+
+def amostras(db):
+    # Ids de referência escolhidos de forma determinística no banco gerado
+    c = db.read_conn
+    func = c.execute("SELECT MIN(id) FROM funcionarios WHERE obra_id = 1 AND ativo = 1").fetchone()[0]
+    inativo = c.execute("SELECT MIN(id) FROM funcionarios WHERE obra_id = 1 AND ativo = 0").fetchone()[0]
+    item = c.execute("SELECT MIN(id) FROM estoque WHERE obra_id = 1").fetchone()[0]
+    ativos = [r[0] for r in c.execute("SELECT id FROM funcionarios WHERE obra_id = 1 AND ativo = 1")]
+    return dict(obra=1, func=func, inativo=inativo, item=item, ativos=ativos)
+
+
+def casos(a, tmp):
+    o, f, item = a["obra"], a["func"], a["item"]
+    lista = [
+        Caso("get_obras", lambda db: db.get_obras()),
+        Caso("get_funcionarios ativos", lambda db: db.get_funcionarios(o)),
+        Caso("get_funcionarios inativos", lambda db: db.get_funcionarios(o, False)),
+        Caso("get_funcionario_by_id", lambda db: db.get_funcionario_by_id(f)),
+        Caso("get_historico_funcionario", lambda db: db.get_historico_funcionario(a["inativo"])),
+        Caso("get_presenca_dia", lambda db: db.get_presenca_dia(o, HOJE)),
+        Caso("relatorio_periodo mes", lambda db: db.relatorio_periodo(o, "2025-11-01", "2025-11-30")),
+        Caso("relatorio_periodo quinzena", lambda db: db.relatorio_periodo(o, "2025-11-10", "2025-11-24")),
+        Caso("relatorio_periodo ano", lambda db: db.relatorio_periodo(o, "2025-01-01", "2025-12-31")),
+        Caso("get_estoque", lambda db: db.get_estoque(o)),
+        Caso("get_estoque em data", lambda db: db.get_estoque(o, "2025-06-15")),
+        Caso("get_material_by_id", lambda db: db.get_material_by_id(item)),
+    ]
+    # Histórico: todas as combinações de filtro da tela, primeira página e a seguinte (keyset)
+    for filtro_item, origem, tipo, cat in itertools.product(["", "Cimento"], ["", "Bloco"], TIPOS, ["Todas", "Hidráulica"]):
+        filtros = (filtro_item, origem, tipo, cat)
+        nome = "get_historico " + "/".join(x or "-" for x in filtros)
+        lista.append(Caso(nome, lambda db, fl=filtros: db.get_historico(o, *fl, limite=PAGINA)))
+        lista.append(Caso(nome + " pág. 2", lambda db, apos, fl=filtros: db.get_historico(o, *fl, apos=apos, limite=PAGINA),
+                          preparar=lambda db, fl=filtros: (pagina_2(db, o, fl),)))
+    lista += [
+        Caso("get_historico completo", lambda db: len(db.get_historico(o))),
+        Caso("contar historico", lambda db: db.contar(*db.sql_historico(o))),
+        Caso("iterar_lotes historico", lambda db: sum(len(l) for l in db.iterar_lotes(*db.sql_historico(o)))),
+        Caso("get_diario", lambda db: db.get_diario(o, HOJE)),
+        Caso("get_resumo_financeiro", lambda db: db.get_resumo_financeiro(o)),
+        Caso("get_saldo", lambda db: db.get_saldo(o)),
+        Caso("get_financeiro", lambda db: db.get_financeiro(o)),
+        Caso("get_epi_historico", lambda db: db.get_epi_historico(o)),
+        Caso("buscar palavra", lambda db: db.buscar(o, "concretagem")),
+        Caso("buscar prefixos", lambda db: db.buscar(o, "cim depos")),
+        Caso("get_dashboard_stats", lambda db: db.get_dashboard_stats(o, HOJE)),
+        Caso("get_portfolio", lambda db: db.get_portfolio(HOJE)),
+        Caso("versao_dados", lambda db: db.versao_dados(), conferir=False),
+    ]
+    # Gravações: só tempo (cada repetição grava de novo no banco de trabalho)
+    seq = itertools.count(1)
+    lista += [
+        Caso("criar_obra", lambda db: db.criar_obra(f"Nova {next(seq)}", "Rua X"), conferir=False),
+        Caso("add_funcionario", lambda db: db.add_funcionario(o, f"Novo {next(seq)}", "Servente", HOJE, "", "", "", "", "", "", 150), conferir=False),
+        Caso("update_funcionario", lambda db: db.update_funcionario(f, "Editado", "Pedreiro", HOJE, "", "", "", "", "", "", next(seq)), conferir=False),
+        Caso("toggle_ativo_funcionario", lambda db: db.toggle_ativo_funcionario(a["inativo"], next(seq) % 2, "bench"), conferir=False),
+        Caso("salvar_presenca", lambda db: db.salvar_presenca(f, HOJE, next(seq) % 2, 1), conferir=False),
+        Caso("salvar_presencas obra", lambda db: db.salvar_presencas(HOJE, [(x, 1, next(seq) % 2) for x in a["ativos"]]), conferir=False),
+        Caso("add_material", lambda db: db.add_material(o, f"Material {next(seq)}", "Geral", "Unidade"), conferir=False),
+        Caso("update_material", lambda db: db.update_material(item, "Editado", "Geral", "Unidade", next(seq), 5, 1), conferir=False),
+        Caso("movimentar_estoque", lambda db: db.movimentar_estoque(item, 3, "entrada", HOJE, "Bench", "", ""), conferir=False),
+        Caso("movimentar_estoque retroativo", lambda db: db.movimentar_estoque(item, 3, "saida", "2024-02-10", "", "Bench", ""), conferir=False),
+        Caso("excluir_movimentacao", lambda db, mid: db.excluir_movimentacao(mid), conferir=False,
+             preparar=lambda db: (db.conn.execute("SELECT MAX(m.id) FROM movimentacoes m JOIN estoque e ON e.id = m.item_id WHERE e.obra_id = ?", (o,)).fetchone()[0],)),
+        Caso("atualizar_snapshots", lambda db: db.atualizar_snapshots(o, HOJE), conferir=False,
+             preparar=lambda db: retroativa(db, item)),
+        Caso("save_diario", lambda db: db.save_diario(o, HOJE, "Nublado", f"Atividade {next(seq)}", ""), conferir=False),
+        Caso("add_financeiro", lambda db: db.add_financeiro(o, HOJE, "saida", 99.9, 1, "Bench", ""), conferir=False),
+        Caso("delete_financeiro", lambda db, fid: db.delete_financeiro(fid), conferir=False,
+             preparar=lambda db: (db.conn.execute("SELECT MAX(id) FROM financeiro WHERE obra_id = ?", (o,)).fetchone()[0],)),
+        Caso("reconstruir_resumo_financeiro", lambda db: db.reconstruir_resumo_financeiro(), conferir=False),
+        Caso("add_epi", lambda db: db.add_epi(o, f, HOJE, "Luva"), conferir=False),
+        Caso("delete_epi", lambda db, eid: db.delete_epi(eid), conferir=False,
+             preparar=lambda db: (db.conn.execute("SELECT MAX(id) FROM epi WHERE obra_id = ?", (o,)).fetchone()[0],)),
+        Caso("importar_movimentacoes 5k", lambda db, path: db.importar_movimentacoes(o, path), conferir=False,
+             preparar=lambda db: (arquivo_csv(tmp),)),
+        Caso("importar_nfe 50 notas", lambda db, pasta: db.importar_nfe(o, [pasta]), conferir=False,
+             preparar=lambda db: (pasta_nfe(tmp, next(seq)),)),
+    ]
+    return lista
+
+
+def retroativa(db, item_id):
+    # Invalida os checkpoints do item desde 2024 para atualizar_snapshots ter o que refazer
+    db.movimentar_estoque(item_id, 1, "entrada", "2024-03-03", "", "", "")
+    return ()
+
+
+def pagina_2(db, obra_id, filtros):
+    # `apos` da segunda página: (data, id) da última linha da primeira
+    pag = db.get_historico(obra_id, *filtros, limite=PAGINA)
+    return (pag[-1][1], pag[-1][0]) if pag else None
+
+
+def arquivo_csv(tmp):
+    path = os.path.join(tmp, "import.csv")
+    if not os.path.exists(path): random.seed(22); gerar_csv(path, 5000, 300)
+    return path
+
+
+def pasta_nfe(tmp, lote):
+    # Chaves novas a cada repetição (as já importadas seriam só puladas)
+    pasta = os.path.join(tmp, f"nfe_{lote}"); os.makedirs(pasta); rnd = random.Random(lote)
+    for n in range(lote * 1000, lote * 1000 + 50):
+        itens = [(*rnd.choice(PRODUTOS), rnd.randint(1, 40), rnd.randint(5, 90)) for _ in range(rnd.randint(1, 12))]
+        with open(os.path.join(pasta, f"{n}.xml"), "w", encoding="utf-8") as f: f.write(xml_nfe(n, itens))
+    return pasta
+
+
+def resumo(resultado):
+    return hashlib.sha1(repr(resultado).encode()).hexdigest()[:16]
+
+
+def medir(db, caso, repeticoes):
+    # Menor tempo das repetições: o ruído da máquina (outros processos, cache) só soma, nunca subtrai
+    tempos = []; resultado = None
+    for _ in range(repeticoes):
+        args = caso.preparar(db) if caso.preparar else ()
+        t0 = time.perf_counter(); resultado = caso.medir(db, *args); tempos.append((time.perf_counter() - t0) * 1000)
+    return min(tempos), resumo(resultado) if caso.conferir else None
+
+
+def banco_de_dados(args):
+    # O banco gerado fica em cache (gerar a escala média leva ~1,5 min); cada execução mede uma cópia dele
+    path = args.banco or os.path.join(tempfile.gettempdir(), f"gestor_sintetico_{args.escala}_{args.semente}.db")
+    if not os.path.exists(path):
+        print(f"gerando banco sintético '{args.escala}' em {path}")
+        db = Database(path); gerar(db, args.escala, args.semente); db.close()
+    Database(path).close()  # aplica no cache as migrações novas (senão cada execução migraria a sua cópia)
+    return path
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Suíte de desempenho do Database")
+    ap.add_argument("--escala", choices=ESCALAS, default="medio")
+    ap.add_argument("--semente", type=int, default=42)
+    ap.add_argument("--banco", help="banco sintético já gerado (gera se não existir)")
+    ap.add_argument("--baseline", help="padrão: benchmarks/baseline_<escala>.json")
+    ap.add_argument("--gravar", action="store_true", help="grava a linha de base em vez de comparar")
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--tolerancia", type=float, default=1.5, help="regressão: mais lento que base x tolerância")
+    ap.add_argument("--folga", type=float, default=5.0, help="ms ignorados na comparação (ruído de casos muito rápidos)")
+    ap.add_argument("--filtro", default="", help="roda só os casos cujo nome contém o texto")
+    ap.add_argument("--desempenho", action="store_true", help="perfil de desempenho do Database (WAL + conexão de leitura)")
+    args = ap.parse_args()
+    baseline = args.baseline or os.path.join(AQUI, f"baseline_{args.escala}.json")
+    origem = banco_de_dados(args)
+    base = None
+    if not args.gravar:
+        if not os.path.exists(baseline): sys.exit(f"sem linha de base em {baseline}: rode com --gravar primeiro")
+        with open(baseline, encoding="utf-8") as f: base = json.load(f)
+        if (base["escala"], base["semente"], base["desempenho"]) != (args.escala, args.semente, args.desempenho):
+            sys.exit(f"linha de base medida com escala={base['escala']} semente={base['semente']} desempenho={base['desempenho']}")
+        if base["sqlite"] != sqlite3.sqlite_version:
+            print(f"aviso: linha de base com SQLite {base['sqlite']}, rodando com {sqlite3.sqlite_version}")
+
+    resultados = {}; falhas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trabalho.db"); shutil.copy(origem, path)
+        db = Database(path, desempenho=args.desempenho)
+        db.atualizar_snapshots(1, HOJE)  # como a tela de estoque faz antes de consultar uma data
+        print(f"{'caso':<58} {'base':>9} {'atual':>9} {'x':>6}")
+        for caso in casos(amostras(db), tmp):
+            if args.filtro.casefold() not in caso.nome.casefold(): continue
+            ms, h = medir(db, caso, args.repeticoes)
+            resultados[caso.nome] = {"ms": round(ms, 3), "hash": h}
+            ref = base["casos"].get(caso.nome) if base else None
+            if not ref:
+                print(f"{caso.nome:<58} {'':>9} {ms:8.2f}ms" + ("   (novo)" if base else "")); continue
+            def regrediu(ms): return ms > ref["ms"] * args.tolerancia and ms - ref["ms"] > args.folga
+            if regrediu(ms): ms = min(ms, medir(db, caso, args.repeticoes * 2)[0])  # confirma antes de acusar
+            situacao = "REGRESSÃO" if regrediu(ms) else ""
+            if ref["hash"] != h: situacao = (situacao + " RESULTADO MUDOU").strip()
+            if situacao: falhas.append(f"{caso.nome}: {situacao} ({ref['ms']:.2f}ms -> {ms:.2f}ms)")
+            print(f"{caso.nome:<58} {ref['ms']:7.2f}ms {ms:7.2f}ms {ms / max(ref['ms'], 1e-3):5.2f}x  {situacao}")
+        db.close()
+
+    if args.gravar:
+        if args.filtro and os.path.exists(baseline):  # gravação parcial: mantém os outros casos
+            with open(baseline, encoding="utf-8") as f: resultados = {**json.load(f)["casos"], **resultados}
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump({"escala": args.escala, "semente": args.semente, "desempenho": args.desempenho,
+                       "sqlite": sqlite3.sqlite_version, "python": platform.python_version(), "maquina": platform.machine(),
+                       "casos": resultados}, f, indent=1, ensure_ascii=False)
+        print(f"linha de base gravada em {baseline} ({len(resultados)} casos)")
+    elif falhas:
+        print(f"\n{len(falhas)} caso(s) falharam:\n" + "\n".join("  " + x for x in falhas))
+        sys.exit(1)
+    else:
+        print("\nsem regressões em relação à linha de base")
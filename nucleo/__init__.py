@@ -0,0 +1,15 @@
+# Núcleo do Gestor de Obras sem interface gráfica: banco de dados, folha, saldos e calculadoras.
+# Só biblioteca padrão (nada de PySide6): importa em milissegundos e roda sem servidor gráfico,
+# então serve à janela (GestorObras.py), a scripts em lote e aos benchmarks.
+from .banco import Database, DashboardStats, PortfolioObra, ImportacaoEstoque, ImportacaoNFe
+from .calculos import (fmt_data, fmt_qtd, COLUNAS_FOLHA, linha_folha, total_folha, COLUNAS_EXTRATO, linha_extrato,
+                       colunas_saldo, linha_saldo, TIPOS_MOVIMENTACAO, COLUNAS_HISTORICO, linha_historico,
+                       em_metros, tijolos, Concreto, concreto)
+from .diagnostico import SLOW_QUERY_LOG, Diagnostico, ConexaoDiagnostico, CursorDiagnostico
+from .nfe import NFe, ler_nfe
+
+__all__ = ["Database", "DashboardStats", "PortfolioObra", "ImportacaoEstoque", "ImportacaoNFe",
+           "fmt_data", "fmt_qtd", "COLUNAS_FOLHA", "linha_folha", "total_folha", "COLUNAS_EXTRATO", "linha_extrato",
+           "colunas_saldo", "linha_saldo", "TIPOS_MOVIMENTACAO", "COLUNAS_HISTORICO", "linha_historico",
+           "em_metros", "tijolos", "Concreto", "concreto",
+           "SLOW_QUERY_LOG", "Diagnostico", "ConexaoDiagnostico", "CursorDiagnostico", "NFe", "ler_nfe"]
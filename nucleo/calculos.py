@@ -0,0 +1,72 @@
+# Regras de cálculo e formatação sem Qt: folha de pagamento, extrato financeiro, saldo e histórico de estoque
+# (linhas prontas para a tabela da tela e para o CSV) e as calculadoras de material.
+from collections import namedtuple
+
+# "yyyy-MM-dd" -> "dd/MM/yyyy" sem criar QDate (usado em laços de milhões de linhas, como nas exportações)
+def fmt_data(iso):
+    if iso and len(iso) == 10 and iso[4] == "-" and iso[7] == "-":
+        return f"{iso[8:10]}/{iso[5:7]}/{iso[:4]}"
+    return iso or ""
+
+def fmt_qtd(qtd_val):
+    if qtd_val is None: qtd_val = 1.0
+    # Se for inteiro (ex: 5.0), mostra 5. Se for decimal (ex: 1.5), mostra 1.5
+    return f"{qtd_val:.2f}".rstrip('0').rstrip('.') if '.' in f"{qtd_val:.2f}" else f"{qtd_val:.2f}"
+
+# --- FOLHA DE PAGAMENTO (linhas de Database.relatorio_periodo) ---
+COLUNAS_FOLHA = ["Nome", "Função", "Admissão", "Telefone", "Dias", "CPF", "RG", "Banco", "Agência", "Conta", "Valor Diária", "Total a Pagar"]
+
+def linha_folha(row):
+    dias = row[4] if row[4] else 0.0
+    diaria = row[10] if row[10] else 0.0
+    return [row[0], row[1], fmt_data(row[2]), row[3], str(dias), *row[5:10], f"R$ {diaria:.2f}", f"R$ {row[11]:.2f}"]
+
+def total_folha(rows):
+    # O total geral vem calculado no SQL, repetido em cada linha
+    return rows[0][12] if rows else 0.0
+
+# --- FINANCEIRO (linhas de Database.get_financeiro / sql_financeiro) ---
+COLUNAS_EXTRATO = ["Data", "Tipo", "Valor", "Quantidade", "Descrição", "NF"]
+
+def linha_extrato(row):
+    return [fmt_data(row[1]), row[2].upper(), f"R$ {row[3]:.2f}", fmt_qtd(row[4]), row[5], row[6] or ""]
+
+# --- ESTOQUE (linhas de Database.get_estoque / sql_estoque e get_historico / sql_historico) ---
+def colunas_saldo(data=None):
+    return ["Item", "Categoria", f"Quantidade em {fmt_data(data)}" if data else "Quantidade"]
+
+def linha_saldo(d):
+    return [d[2], d[3] or "-", f"{d[5]} {d[4]}"]
+
+TIPOS_MOVIMENTACAO = {"entrada": "Entrada", "saida": "Saída", "uso_interno": "Uso Interno"}
+COLUNAS_HISTORICO = ["Data", "Item", "Categoria", "Tipo", "Quantidade", "Origem", "Destino", "NF"]
+
+def linha_historico(d):
+    # Linha inteira de uma vez (sem a coluna ID): a exportação chama isto milhões de vezes
+    tipo = TIPOS_MOVIMENTACAO.get(d[4], "Uso Interno")
+    return [fmt_data(d[1]), d[2], d[3] or "-", tipo, f"{d[5]} {d[6]}", d[7] or "", d[8] or "", d[9] or ""]
+
+# --- CALCULADORAS DE MATERIAL ---
+def em_metros(texto, unidade):
+    # Texto digitado ("2,5") na unidade escolhida ("m" ou "cm"); vazio ou inválido conta como 0
+    try:
+        val = float(texto.replace(',', '.'))
+        if unidade == "cm": return val / 100
+        return val
+    except: return 0.0
+
+def tijolos(parede_larg, parede_alt, tijolo_larg, tijolo_alt, perda=0.10):
+    # Quantidade de tijolos para a parede (medidas em metros), com a perda somada
+    if tijolo_larg * tijolo_alt == 0: raise ValueError("medida do tijolo zerada")
+    return int((parede_larg * parede_alt) / (tijolo_larg * tijolo_alt) * (1 + perda))
+
+Concreto = namedtuple("Concreto", ["volume", "sacos_cimento", "areia", "brita"])  # m³, sacos de 50 kg, m³, m³
+
+def concreto(comp, larg, esp, cimento=1.0, areia=2.0, brita=3.0):
+    # Volume seco = 1,52 x volume úmido, dividido pelo traço (C:A:B); cimento a 1440 kg/m³ em sacos de 50 kg
+    total_partes = cimento + areia + brita
+    if total_partes == 0: raise ValueError("traço zerado")
+    vol_m3 = comp * larg * esp
+    vol_seco = vol_m3 * 1.52
+    vol_cimento = (cimento / total_partes) * vol_seco
+    return Concreto(vol_m3, (vol_cimento * 1440) / 50, (areia / total_partes) * vol_seco, (brita / total_partes) * vol_seco)
@@ -0,0 +1,131 @@
+# Diagnóstico de desempenho (opcional). Ligado pela janela oculta (Ctrl+Shift+D): tempo e linhas de cada método
+# do Database e de cada comando SQL, estatísticas por nome (p50/p95/máx) e log rotativo do que passar do limite,
+# com o EXPLAIN QUERY PLAN do comando. Desligado, nada disso existe: sem invólucros nos métodos e conexões sqlite3 comuns.
+import sqlite3
+import threading
+import time
+from collections import deque
+
+SLOW_QUERY_LOG = "consultas_lentas.log"  # só gravado quando o diagnóstico está ligado
+
+class Diagnostico:
+    def __init__(self, log_path=SLOW_QUERY_LOG, limite_ms=100.0, amostras=1000):
+        import logging
+        from logging.handlers import RotatingFileHandler
+        self.log_path = log_path; self.limite_ms = limite_ms; self.amostras = amostras
+        self.lock = threading.Lock(); self.stats = {}  # (tipo, nome) -> [chamadas, total_ms, max_ms, linhas, últimos tempos]
+        self.log = logging.getLogger("gestorobras.lentas"); self.log.setLevel(logging.INFO); self.log.propagate = False
+        for h in self.log.handlers[:]: self.log.removeHandler(h); h.close()
+        handler = RotatingFileHandler(log_path, maxBytes=1_000_000, backupCount=3, encoding="utf-8", delay=True)
+        handler.setFormatter(logging.Formatter("%(asctime)s [%(threadName)s] %(message)s")); self.log.addHandler(handler)
+
+    @staticmethod
+    def linhas(resultado):
+        return len(resultado) if isinstance(resultado, list) else 0 if resultado is None else 1 if isinstance(resultado, tuple) else None
+
+    def cronometrar(self, nome, metodo):
+        def medido(*args, **kwargs):
+            t0 = time.perf_counter()
+            r = metodo(*args, **kwargs)
+            self.registrar("método", nome, (time.perf_counter() - t0) * 1000, self.linhas(r))
+            return r
+        return medido
+
+    def registrar(self, tipo, nome, ms, linhas, plano=None):
+        with self.lock:
+            s = self.stats.get((tipo, nome))
+            if s is None: s = self.stats[(tipo, nome)] = [0, 0.0, 0.0, 0, deque(maxlen=self.amostras)]
+            s[0] += 1; s[1] += ms; s[2] = max(s[2], ms); s[3] += linhas or 0; s[4].append(ms)
+        if ms >= self.limite_ms:
+            self.log.info(f"{ms:.1f}ms {tipo} ({'-' if linhas is None else linhas} linhas): {nome}" + (f"\n{plano}" if plano else ""))
+
+    def registrar_sql(self, conn, sql, params, ms, linhas):
+        nome = " ".join(sql.split())
+        self.registrar("sql", nome, ms, linhas, self.plano(conn, sql, params) if ms >= self.limite_ms and params is not None else None)
+
+    @staticmethod
+    def plano(conn, sql, params):
+        # Cursor sqlite3 comum: o EXPLAIN não é cronometrado nem registrado
+        try: passos = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        except sqlite3.Error: return None
+        nivel = {0: 0}; linhas = []
+        for id_, pai, _, detalhe in passos:
+            nivel[id_] = nivel.get(pai, 0) + 1; linhas.append("    " * nivel[id_] + detalhe)
+        return "\n".join(linhas)
+
+    def resumo(self, tipo):
+        # (nome, chamadas, total, p50, p95, máx, linhas por chamada), do maior tempo total para o menor
+        with self.lock: itens = [(nome, list(s[:4]), sorted(s[4])) for (t, nome), s in self.stats.items() if t == tipo]
+        pct = lambda v, q: v[min(len(v) - 1, int(q * len(v)))]
+        return sorted(((nome, n, total, pct(v, 0.5), pct(v, 0.95), mx, linhas / n) for nome, (n, total, mx, linhas), v in itens),
+                      key=lambda r: -r[2])
+
+    def zerar(self):
+        with self.lock: self.stats.clear()
+
+class CursorDiagnostico(sqlite3.Cursor):
+    # Soma o tempo do execute e dos fetch* de um comando; registra quando ele termina
+    # (resultado esgotado, próximo execute no mesmo cursor, close ou descarte do cursor)
+    diag = None; sql = None
+
+    def execute(self, sql, params=()):
+        return self.medir(super().execute, sql, params, params)
+
+    def executemany(self, sql, seq):
+        return self.medir(super().executemany, sql, seq, None)  # sem EXPLAIN: parâmetros de várias linhas
+
+    def medir(self, executar, sql, args, params):
+        self.encerrar(); self.sql, self.params, self.ms, self.lidas = sql, params, 0.0, 0
+        t0 = time.perf_counter()
+        try: return executar(sql, args)
+        finally: self.ms += (time.perf_counter() - t0) * 1000
+
+    def buscar(self, fetch, *args):
+        t0 = time.perf_counter(); r = fetch(*args)
+        if self.sql is not None: self.ms += (time.perf_counter() - t0) * 1000
+        return r
+
+    def fetchall(self):
+        r = self.buscar(super().fetchall); self.lidas += len(r); self.encerrar(); return r
+
+    def fetchmany(self, *args):
+        r = self.buscar(super().fetchmany, *args); self.lidas += len(r)
+        if not r: self.encerrar()
+        return r
+
+    def fetchone(self):
+        r = self.buscar(super().fetchone)
+        if r is None: self.encerrar()
+        else: self.lidas += 1
+        return r
+
+    def __next__(self):
+        try: r = self.buscar(super().__next__)
+        except StopIteration: self.encerrar(); raise
+        self.lidas += 1; return r
+
+    def close(self):
+        self.encerrar(); super().close()
+
+    def __del__(self):
+        self.encerrar()
+
+    def encerrar(self):
+        if self.sql is None: return
+        sql, self.sql = self.sql, None
+        linhas = self.lidas if self.description else max(self.rowcount, 0)
+        try: self.diag.registrar_sql(self.connection, sql, self.params, self.ms, linhas)
+        except Exception: pass  # o diagnóstico nunca derruba a operação medida
+
+class ConexaoDiagnostico(sqlite3.Connection):
+    # Connection.execute do sqlite3 não passa por cursor(): os atalhos são refeitos aqui
+    diag = None
+
+    def cursor(self, factory=CursorDiagnostico):
+        c = super().cursor(factory); c.diag = self.diag; return c
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq):
+        return self.cursor().executemany(sql, seq)
@@ -0,0 +1,103 @@
+# Modo em lote (sem janela): folha de pagamento, extrato financeiro e saldo de estoque de uma ou de todas as obras
+# em CSV, para o fechamento do mês ou para o cron. Abre o banco só para leitura (o programa pode estar aberto) e
+# gera cada obra num processo próprio. Os CSVs saem iguais aos exportados pela janela (mesmas colunas e linhas).
+# Uso: python -m nucleo.lote [--banco obra_gestor.db] [--obra ID ...] [--de 2026-09-01 --ate 2026-09-30]
+#                            [--saida relatorios] [--processos N]
+# Sem --de/--ate, usa o mês anterior (ex.: cron no dia 1: "0 6 1 * * cd /caminho && python -m nucleo.lote").
+# Sai com 0 se tudo foi gerado, 1 se alguma obra falhou e 2 se o banco não pôde ser aberto.
+import argparse
+import csv
+import multiprocessing
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from .banco import Database
+from .calculos import COLUNAS_FOLHA, linha_folha, COLUNAS_EXTRATO, linha_extrato, colunas_saldo, linha_saldo
+
+ResultadoObra = namedtuple("ResultadoObra", ["obra_id", "nome", "pasta", "linhas", "ms", "erro"])
+
+def mes_anterior(hoje=None):
+    ate = (hoje or date.today()).replace(day=1) - timedelta(days=1)
+    return ate.replace(day=1).isoformat(), ate.isoformat()
+
+def pasta_obra(obra_id, nome):
+    return f"{obra_id:03d}_" + re.sub(r"[^\w-]+", "_", nome).strip("_")
+
+def gravar_csv(db, path, colunas, consulta, formatar):
+    # Em lotes (memória constante) e num arquivo temporário: quem lê a pasta nunca vê um CSV pela metade
+    linhas = 0; parcial = path + ".parcial"
+    with open(parcial, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(colunas)
+        for lote in db.iterar_lotes(*consulta):
+            writer.writerows(formatar(r) for r in lote); linhas += len(lote)
+    os.replace(parcial, path)
+    return linhas
+
+def gerar_obra(tarefa):
+    # Roda no processo do pool: conexão própria, e os três relatórios lidos do mesmo retrato do banco
+    banco, obra_id, nome, d1, d2, saida = tarefa
+    t0 = time.perf_counter(); pasta = os.path.join(saida, pasta_obra(obra_id, nome))
+    try:
+        db = Database(banco, somente_leitura=True)
+        try:
+            os.makedirs(pasta, exist_ok=True)
+            with db.leitura():
+                linhas = {
+                    "folha": gravar_csv(db, os.path.join(pasta, f"folha_{d1}_{d2}.csv"), COLUNAS_FOLHA,
+                                        db.sql_relatorio(obra_id, d1, d2), linha_folha),
+                    "extrato": gravar_csv(db, os.path.join(pasta, f"extrato_{d1}_{d2}.csv"), COLUNAS_EXTRATO,
+                                          db.sql_financeiro(obra_id, d1, d2), linha_extrato),
+                    "saldo": gravar_csv(db, os.path.join(pasta, f"saldo_estoque_{d2}.csv"), colunas_saldo(d2),
+                                        db.sql_estoque(obra_id, d2), linha_saldo),
+                }
+        finally: db.close()
+        return ResultadoObra(obra_id, nome, pasta, linhas, (time.perf_counter() - t0) * 1000, None)
+    except Exception as e:
+        return ResultadoObra(obra_id, nome, pasta, {}, (time.perf_counter() - t0) * 1000, str(e))
+
+def gerar(banco, d1, d2, saida, obras=None, processos=None):
+    # Gera os relatórios das obras (ids; None = todas) e devolve um ResultadoObra por obra, na ordem em que terminam
+    db = Database(banco, somente_leitura=True)
+    try: todas = {r[0]: r[1] for r in db.get_obras()}
+    finally: db.close()
+    if obras and (faltando := [o for o in obras if o not in todas]): raise ValueError(f"obra(s) não encontrada(s): {faltando}")
+    tarefas = [(banco, o, todas[o], d1, d2, saida) for o in sorted(obras or todas)]
+    processos = min(processos or os.cpu_count() or 1, len(tarefas))
+    if processos <= 1: yield from map(gerar_obra, tarefas); return
+    with multiprocessing.Pool(processos) as pool: yield from pool.imap_unordered(gerar_obra, tarefas)
+
+def data_iso(texto):
+    try: return date.fromisoformat(texto).isoformat()
+    except ValueError: raise argparse.ArgumentTypeError(f"data inválida '{texto}' (use AAAA-MM-DD)")
+
+def main(argv=None):
+    de, ate = mes_anterior()
+    ap = argparse.ArgumentParser(prog="python -m nucleo.lote", description="Folha, extrato e saldo de estoque das obras em CSV, sem abrir a janela")
+    ap.add_argument("--banco", default="obra_gestor.db")
+    ap.add_argument("--obra", type=int, action="append", help="id da obra (repita para várias; padrão: todas)")
+    ap.add_argument("--de", type=data_iso, default=de, help=f"início do período, AAAA-MM-DD (padrão: {de})")
+    ap.add_argument("--ate", type=data_iso, default=ate, help=f"fim do período, AAAA-MM-DD (padrão: {ate})")
+    ap.add_argument("--saida", default="relatorios", help="pasta de saída (uma subpasta por obra)")
+    ap.add_argument("--processos", type=int, help="obras geradas em paralelo (padrão: núcleos da máquina)")
+    args = ap.parse_args(argv)
+    if args.de > args.ate: ap.error("--de depois de --ate")
+
+    t0 = time.perf_counter(); falhas = 0; n = 0
+    try:
+        for r in gerar(args.banco, args.de, args.ate, args.saida, args.obra, args.processos):
+            n += 1
+            if r.erro: falhas += 1; print(f"obra {r.obra_id} ({r.nome}): ERRO {r.erro}", file=sys.stderr)
+            else: print(f"obra {r.obra_id} ({r.nome}): " + ", ".join(f"{k} {v}" for k, v in r.linhas.items()) + f" linhas em {r.ms:.0f}ms -> {r.pasta}")
+    except (sqlite3.Error, ValueError) as e:
+        print(f"{args.banco}: {e}", file=sys.stderr); return 2
+    print(f"{n - falhas}/{n} obras de {args.de} a {args.ate} em {time.perf_counter() - t0:.1f}s")
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
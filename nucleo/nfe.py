@@ -0,0 +1,29 @@
+# Leitura de NF-e (XML da SEFAZ) para a importação no estoque/financeiro.
+# iterparse incremental: cada <det> é lido e descartado, então a memória não depende do tamanho do arquivo.
+# Devolve None sem ler o resto quando `pular(chave)` diz que a nota já foi importada.
+from collections import namedtuple
+
+NFe = namedtuple("NFe", ["chave", "numero", "data", "emitente", "valor", "itens"])  # itens: (descricao, unidade, qtd, valor)
+
+def ler_nfe(path, pular=None):
+    from xml.etree.ElementTree import iterparse
+    chave = numero = data = emitente = valor = None; itens = []
+    for evento, el in iterparse(path, events=("start", "end")):
+        tag = el.tag.rpartition("}")[2]
+        if evento == "start":
+            if tag == "infNFe":
+                chave = "".join(filter(str.isdigit, el.get("Id", "")))
+                if pular and len(chave) == 44 and pular(chave): return None
+        elif tag == "det":
+            prod = {c.tag.rpartition("}")[2]: c.text for c in el.find("{*}prod")}
+            itens.append(((prod.get("xProd") or "").strip(), prod.get("uCom") or "Unidade",
+                          float(prod.get("qCom") or 0), float(prod.get("vProd") or 0)))
+            el.clear()
+        elif tag == "ide":
+            numero = el.findtext("{*}nNF"); data = (el.findtext("{*}dhEmi") or el.findtext("{*}dEmi") or "")[:10]
+        elif tag == "emit": emitente = el.findtext("{*}xNome")
+        elif tag == "ICMSTot" and (v := el.findtext("{*}vNF")): valor = float(v)
+        elif tag == "chNFe" and not chave: chave = el.text
+    if not chave or len(chave) != 44: raise ValueError("chave de acesso não encontrada")
+    if not data or valor is None: raise ValueError("data de emissão ou valor total ausente")
+    return NFe(chave, numero, data, emitente or "", valor, itens)